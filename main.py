@@ -4,6 +4,26 @@ import os
 import math 
 import random
 import time
+import queue
+import threading
+import struct
+from collections import Counter, OrderedDict
+import ast
+import hashlib
+import io
+import json
+import mmap
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import compress
+import operator
+try:
+    import numpy as np
+except ImportError: # 没有 numpy 时粒子改用列表存储
+    np = None
+
+# 记录进程启动时间 (用于统计首帧耗时)
+APP_START_TIME = time.perf_counter()
 
 # 初始化 Pygame
 pygame.init()
@@ -31,6 +51,32 @@ BOX_COLOR = (84, 68, 52)         # 544434
 TEXT_OUTLINE_COLOR = (0, 0, 0)   # 黑色描边
 LEVEL_TITLE_OUTLINE = (84, 68, 52) # 关卡标题描边
 
+# --- 启动设置 ---
+# 渐进式启动：只同步加载第一幅开场画面，其余图片和音效在后台线程加载
+PROGRESSIVE_STARTUP = True
+STARTUP_IMAGE_KEYS = ["1"] # Step 1 需要的图片
+ASSET_WORKERS = os.cpu_count() or 4 # 图片解码/缩放线程数
+ASSET_MEMORY_BUDGET_MB = 48 # 预取预算：释放已结束场景后常驻图片仍超过此值时，不再预取下一场景
+TRANSFORM_CACHE_MB = 16 # 运行时缩放/旋转结果的缓存预算，超出时淘汰最久未用的
+TEXT_CACHE_MB = 8 # 文字框 Surface 缓存预算
+PROFILE_STEPS = (5, 19, 25, 31) # 统计这些步骤的平均绘制耗时，退出时打印
+DIRTY_RECT_RENDERING = True # 只重绘并提交与上一帧不同的区域 (步骤切换时整屏刷新)
+DIRTY_FULL_REDRAW_RATIO = 0.5 # 脏区域超过屏幕面积的这个比例时改为整屏重绘
+DIRTY_MAX_RECTS = 48 # 变化的绘制指令过多 (如下雨) 时直接整屏重绘
+DIRTY_HASH_PIXELS = 128 * 1024 # 不超过这个像素数的图片按内容比较，更大的按对象比较
+
+# 预处理图片缓存：缩放/旋转后的像素直接存盘，源文件或缩放参数变化时自动失效
+USE_IMAGE_CACHE = True
+IMAGE_CACHE_DIR = os.path.join(".cache", "images")
+
+# 资源包：所有图片/音效/字体打包为单个文件 (python main.py --build-bundle 生成)
+# 存在时优先从资源包读取，不存在时回退到散落的资源文件
+ASSET_BUNDLE_PATH = "assets.bundle"
+
+# 音效 PCM 缓存：按混音器的采样率/格式存储解码后的数据，热启动时直接 mmap 读取
+USE_AUDIO_CACHE = True
+AUDIO_CACHE_DIR = os.path.join(".cache", "audio")
+
 # --- 字体路径 ---
 FONT_PATH = "StoryScript-Regular.ttf" 
 
@@ -102,6 +148,28 @@ SOUND_PATHS = {
     "sourrain": "music/sourrain.mp3"
 }
 
+# --- 音效播放策略 ---
+# music: 背景音乐，始终流式播放
+# solo: 播放时 BGM 已停止 (可占用 music 通道)，时长超过 STREAM_MIN_SECONDS 时流式播放
+# ambience / overlay / oneshot: 与 BGM 同时播放，必须常驻内存 (music 通道只有一个)
+SOUND_USAGE = {
+    "pic1": "overlay", # step 2 起 BGM 开始播放时可能仍在播放
+    "pic2": "overlay",
+    "bgm": "music",
+    "click": "oneshot",
+    "countbackward": "oneshot",
+    "drop": "oneshot",
+    "water": "oneshot",
+    "ending": "overlay", # 与淡出中的 BGM 交叉淡入淡出
+    "fail": "oneshot",
+    "pass": "oneshot",
+    "rainy": "ambience",
+    "shit": "oneshot",
+    "sourrain": "ambience"
+}
+STREAM_MIN_SECONDS = 20.0
+MP3_BITRATE_ESTIMATE = 128000 # 没有 PCM 缓存时按此码率估算时长
+
 # --- 教学互动常量 ---
 MAX_ARM_SPREAD = 200    
 ARM_MOVEMENT_SPEED = 0.5  
@@ -152,15 +220,167 @@ FADE_RESTART_SPEED = 10
 # ==========================================
 # 2. 系统初始化与资源加载函数
 # ==========================================
+
+# --------------------------------------------------------------------------
+# 资源包 (单文件 + 索引，运行时 mmap 读取)
+# --------------------------------------------------------------------------
+# 文件结构: 头部 (魔数, 索引长度) + JSON 索引 + 各资源原始字节
+# 索引: {"images": {key: [偏移, 长度, crc32]}, "sounds": {...}, "fonts": {...}}
+
+_BUNDLE_HEADER = struct.Struct("<4sI")
+_BUNDLE_MAGIC = b"MFB1"
+
+def resolve_asset_path(path):
+    """按实际文件名解析路径 (忽略大小写，如 music/*.mp3 与磁盘上的 .MP3)，找不到返回 None"""
+    if os.path.exists(path):
+        return path
+    folder, name = os.path.split(path)
+    try:
+        for entry in os.listdir(folder or "."):
+            if entry.lower() == name.lower():
+                return os.path.join(folder, entry)
+    except OSError:
+        pass
+    return None
+
+def build_asset_bundle(bundle_path=ASSET_BUNDLE_PATH):
+    """把 IMG_PATHS / SOUND_PATHS / 字体打包成一个资源包文件"""
+    groups = {
+        "images": IMG_PATHS,
+        "sounds": SOUND_PATHS,
+        "fonts": {"main": FONT_PATH},
+    }
+    index = {name: {} for name in groups}
+    blobs = []
+    offset = 0
+    for group, paths in groups.items():
+        for key, path in paths.items():
+            real_path = resolve_asset_path(path)
+            if real_path is None:
+                print(f"警告: 资源 {path} 未找到，不写入资源包")
+                continue
+            with open(real_path, "rb") as f:
+                data = f.read()
+            index[group][key] = [offset, len(data), zlib.crc32(data)]
+            blobs.append(data)
+            offset += len(data)
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    data_start = _BUNDLE_HEADER.size + len(index_bytes)
+    for entries in index.values():
+        for entry in entries.values():
+            entry[0] += data_start
+    # 偏移修正后重新序列化 (数字位数变化会改变索引长度，直到稳定)
+    while True:
+        index_bytes = json.dumps(index).encode("utf-8")
+        new_start = _BUNDLE_HEADER.size + len(index_bytes)
+        if new_start == data_start:
+            break
+        for entries in index.values():
+            for entry in entries.values():
+                entry[0] += new_start - data_start
+        data_start = new_start
+
+    tmp_path = bundle_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_BUNDLE_HEADER.pack(_BUNDLE_MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for data in blobs:
+            f.write(data)
+    os.replace(tmp_path, bundle_path)
+    count = sum(len(entries) for entries in index.values())
+    print(f"资源包已生成: {bundle_path} ({count} 项, {data_start + offset} 字节)")
+
+class BundleReader(io.RawIOBase):
+    """资源包中一段数据的只读文件对象，直接读取 mmap 切片"""
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+asset_bundle = None # {"index": ..., "view": memoryview}
+
+def open_asset_bundle(bundle_path=ASSET_BUNDLE_PATH):
+    """mmap 打开资源包，不存在或格式不符时返回 None"""
+    try:
+        with open(bundle_path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    index = None
+    if len(mapped) >= _BUNDLE_HEADER.size:
+        magic, index_len = _BUNDLE_HEADER.unpack_from(mapped)
+        index_end = _BUNDLE_HEADER.size + index_len
+        if magic == _BUNDLE_MAGIC and index_end <= len(mapped):
+            try:
+                index = json.loads(bytes(mapped[_BUNDLE_HEADER.size:index_end]))
+            except ValueError:
+                pass
+    if index is None:
+        # 截断或损坏的资源包：退回读取原始文件
+        mapped.close()
+        print(f"警告: {bundle_path} 不是有效的资源包，已忽略")
+        return None
+    return {"index": index, "view": memoryview(mapped)}
+
+def bundle_entry(group, key):
+    """资源包中的条目 [偏移, 长度, crc32]，没有资源包或条目缺失时返回 None"""
+    if asset_bundle is None:
+        return None
+    return asset_bundle["index"][group].get(key)
+
+def bundle_reader(group, key):
+    entry = bundle_entry(group, key)
+    if entry is None:
+        return None
+    offset, length, _ = entry
+    return BundleReader(asset_bundle["view"][offset:offset + length])
+
+if __name__ == "__main__" and "--build-bundle" in sys.argv:
+    build_asset_bundle()
+    sys.exit()
+
+asset_bundle = open_asset_bundle()
+
+def font_source():
+    """字体来源：资源包内字体的独立副本 (SDL_ttf 按需回读字体数据，各 Font 不能共用文件对象) 或字体路径"""
+    entry = bundle_entry("fonts", "main")
+    if entry is None:
+        return FONT_PATH
+    offset, length, _ = entry
+    return io.BytesIO(bytes(asset_bundle["view"][offset:offset + length]))
+
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Game Opening Sequence")
 clock = pygame.time.Clock()
 
 try:
-    game_font = pygame.font.Font(FONT_PATH, 36)
-    ui_big_font = pygame.font.Font(FONT_PATH, 36) # 新增：36号大字体
-    level_font = pygame.font.Font(FONT_PATH, 60)
-    countdown_font = pygame.font.Font(FONT_PATH, 120) # 倒计时大字体
+    game_font = pygame.font.Font(font_source(), 36)
+    ui_big_font = pygame.font.Font(font_source(), 36) # 新增：36号大字体
+    level_font = pygame.font.Font(font_source(), 60)
+    countdown_font = pygame.font.Font(font_source(), 120) # 倒计时大字体
 except:
     print(f"提示: 未找到字体 {FONT_PATH}，使用系统默认字体")
     game_font = pygame.font.Font(None, 36)
@@ -168,10 +388,20 @@ except:
     level_font = pygame.font.Font(None, 60)
     countdown_font = pygame.font.Font(None, 120)
 
+placeholder_imgs = set() # 源文件缺失、用色块代替的图片 key (标签在主线程的 finish_img 中绘制)
+
 def load_img(key, size=None):
+    """读取图片文件 (不做 convert，可在后台线程调用)"""
     path = IMG_PATHS[key]
     try:
-        img = pygame.image.load(path).convert_alpha()
+        if asset_bundle is not None:
+            # 资源包已在打包时确认文件是否存在，缺失时直接生成色块
+            reader = bundle_reader("images", key)
+            if reader is None:
+                raise FileNotFoundError(path)
+            img = pygame.image.load(reader, path)
+        else:
+            img = pygame.image.load(path)
         if size:
             img = pygame.transform.scale(img, size)
     except FileNotFoundError:
@@ -194,51 +424,255 @@ def load_img(key, size=None):
         if "icon_heart" in key: color = (200, 50, 50)
         
         img.fill(color)
-        
-        if "icon" not in key:
-            text = game_font.render(f"IMG {key}", True, WHITE)
-            text_rect = text.get_rect(center=(w//2, h//2))
-            img.blit(text, text_rect)
+        # 字体不是线程安全的，"IMG key" 标签留给主线程绘制
+        placeholder_imgs.add(key)
     return img
 
-# 加载音效函数
-def load_sounds():
-    loaded_sounds = {}
-    for key, path in SOUND_PATHS.items():
-        if key == "bgm":
-            # BGM使用music模块加载，这里只检查文件存在性
-            if not os.path.exists(path):
-                print(f"警告: 音频文件 {path} 未找到")
-            continue
-        try:
-            loaded_sounds[key] = pygame.mixer.Sound(path)
-        except FileNotFoundError:
-            print(f"警告: 音频文件 {path} 未找到，将静音")
-            # 创建一个空声音对象以防报错
-            loaded_sounds[key] = pygame.mixer.Sound(buffer=bytearray()) 
-    return loaded_sounds
+def label_placeholder(key, img):
+    """主线程：在色块占位图中央写上图片名"""
+    if "icon" not in key:
+        text = game_font.render(f"IMG {key}", True, WHITE)
+        text_rect = text.get_rect(center=(img.get_width() // 2, img.get_height() // 2))
+        img.blit(text, text_rect)
 
-sounds = load_sounds()
+# --------------------------------------------------------------------------
+# 音效 PCM 缓存 (按混音器格式解码后的原始数据，热启动时跳过 MP3 解码)
+# --------------------------------------------------------------------------
 
-def play_bgm():
-    if os.path.exists(SOUND_PATHS["bgm"]):
+def remove_stale_cache_files(cache_path):
+    """写入新缓存后删除同一资源的旧版本 (文件名为 "<名称>-<摘要><扩展名>"，摘要变了旧文件就不会再被读到)"""
+    cache_dir, file_name = os.path.split(cache_path)
+    stem, ext = os.path.splitext(file_name)
+    name = stem.rsplit("-", 1)[0]
+    try:
+        others = os.listdir(cache_dir)
+    except OSError:
+        return
+    for other in others:
+        other_stem, other_ext = os.path.splitext(other)
+        if other != file_name and other_ext == ext and other_stem.rsplit("-", 1)[0] == name:
+            try:
+                os.remove(os.path.join(cache_dir, other))
+            except OSError:
+                pass
+
+def get_sound_cache_path(key, path):
+    """缓存文件路径；键由音源、修改时间/校验和与混音器格式决定。音源不存在时返回 None"""
+    mixer_format = pygame.mixer.get_init()
+    if mixer_format is None:
+        return None
+    if asset_bundle is not None:
+        entry = bundle_entry("sounds", key)
+        if entry is None:
+            return None
+        source_ident = f"bundle|{entry[1]}|{entry[2]}"
+    else:
         try:
-            pygame.mixer.music.load(SOUND_PATHS["bgm"])
-            pygame.mixer.music.play(-1, fade_ms=2000) # 循环播放，2秒淡入
-        except:
+            st = os.stat(path)
+        except OSError:
+            return None
+        source_ident = f"{st.st_mtime_ns}|{st.st_size}"
+    ident = f"{path}|{source_ident}|{mixer_format!r}"
+    digest = hashlib.sha1(ident.encode("utf-8")).hexdigest()
+    return os.path.join(AUDIO_CACHE_DIR, f"{key}-{digest[:16]}.pcm")
+
+def read_sound_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # Sound(buffer=...) 会复制 PCM 数据，返回后即可关闭映射
+            return pygame.mixer.Sound(buffer=mapped)
+    except (OSError, ValueError):
+        # 文件不存在，或为空文件 (无法 mmap)
+        return None
+
+def write_sound_cache(cache_path, sound):
+    tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(sound.get_raw())
+        os.replace(tmp_path, cache_path)
+        remove_stale_cache_files(cache_path)
+    except (OSError, pygame.error) as e:
+        # 写到一半失败 (如混音器已关闭) 时删掉临时文件，它不会被 remove_stale_cache_files 清理
+        try:
+            os.remove(tmp_path)
+        except OSError:
             pass
+        print(f"提示: 无法写入音效缓存 {cache_path}: {e}")
+
+# 加载音效函数
+def load_sound(key, path):
+    """加载单个音效 (优先读取 PCM 缓存)，文件缺失时返回空声音对象"""
+    cache_path = get_sound_cache_path(key, path) if USE_AUDIO_CACHE else None
+    if cache_path:
+        sound = read_sound_cache(cache_path)
+        if sound is not None:
+            return sound
+    try:
+        if asset_bundle is not None:
+            reader = bundle_reader("sounds", key)
+            if reader is None:
+                raise FileNotFoundError(path)
+            sound = pygame.mixer.Sound(reader)
+        else:
+            sound = pygame.mixer.Sound(path)
+    except FileNotFoundError:
+        print(f"警告: 音频文件 {path} 未找到，将静音")
+        # 创建一个空声音对象以防报错
+        return pygame.mixer.Sound(buffer=bytearray()) 
+    if cache_path:
+        write_sound_cache(cache_path, sound)
+    return sound
+
+class SoundTable(dict):
+    """音效表：后台加载尚未完成的音效先返回静音对象"""
+    def __missing__(self, key):
+        return SILENT_SOUND
+
+SILENT_SOUND = pygame.mixer.Sound(buffer=bytearray())
+sounds = SoundTable()
+
+def sound_available(key):
+    if asset_bundle is not None:
+        return bundle_entry("sounds", key) is not None
+    return os.path.exists(SOUND_PATHS[key])
+
+def estimate_sound_duration(key, path):
+    """估算音频时长 (秒)：有 PCM 缓存时按缓存大小精确计算，否则按 MP3 码率估算"""
+    cache_path = get_sound_cache_path(key, path) if USE_AUDIO_CACHE else None
+    if cache_path and os.path.exists(cache_path):
+        freq, fmt, channels = pygame.mixer.get_init()
+        return os.path.getsize(cache_path) / (freq * channels * (abs(fmt) // 8))
+    entry = bundle_entry("sounds", key)
+    if entry is not None:
+        size = entry[1]
+    else:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+    return size * 8 / MP3_BITRATE_ESTIMATE
+
+def choose_sound_policy(key):
+    """返回 "stream" (music 通道流式播放) 或 "resident" (解码为 Sound 常驻内存)"""
+    usage = SOUND_USAGE.get(key, "oneshot")
+    if usage == "music":
+        return "stream"
+    if usage == "solo":
+        duration = sound_durations[key]
+        if duration is not None and duration >= STREAM_MIN_SECONDS:
+            return "stream"
+    return "resident"
+
+sound_durations = {key: estimate_sound_duration(key, path) for key, path in SOUND_PATHS.items()}
+sound_policy = {key: choose_sound_policy(key) for key in SOUND_PATHS}
+
+def sound_load_order():
+    """常驻音效的后台加载顺序：开场立即播放的 pic1 最先，其余按时长从短到长"""
+    keys = [key for key in SOUND_PATHS if sound_policy[key] == "resident"]
+    return sorted(keys, key=lambda k: (k != "pic1", sound_durations[k] or 0))
+
+_pending_stream = None # 等待 music 通道空闲后播放的 (key, loops, fade_ms)
+
+def start_stream(key, loops=0, fade_ms=0):
+    if not sound_available(key):
+        return
+    try:
+        reader = bundle_reader("sounds", key)
+        if reader is not None:
+            # music 模块流式读取，文件对象需要在播放期间保持有效
+            pygame.mixer.music.load(reader, "mp3")
+        else:
+            pygame.mixer.music.load(SOUND_PATHS[key])
+        pygame.mixer.music.play(loops, fade_ms=fade_ms)
+    except pygame.error:
+        pass
+
+def play_clip(key, loops=0, fade_ms=0):
+    """按播放策略播放音效：常驻片段用 Sound，流式片段用 music 通道"""
+    global _pending_stream
+    if sound_policy.get(key) == "stream":
+        if pygame.mixer.music.get_busy():
+            # music 通道只有一个：等当前音乐 (如淡出中的 BGM) 结束后再播放
+            _pending_stream = (key, loops, fade_ms)
+        else:
+            start_stream(key, loops, fade_ms)
+    else:
+        sounds[key].play(loops, fade_ms=fade_ms)
+
+def fadeout_clip(key, ms):
+    if sound_policy.get(key) == "stream":
+        pygame.mixer.music.fadeout(ms)
+    else:
+        sounds[key].fadeout(ms)
+
+def is_clip_ready(key):
+    return sound_policy.get(key) == "stream" or key in sounds
+
+def update_audio():
+    """每帧调用：music 通道空闲后开始播放排队的流式片段"""
+    global _pending_stream
+    if _pending_stream is not None and not pygame.mixer.music.get_busy():
+        start_stream(*_pending_stream)
+        _pending_stream = None
+
+def play_bgm():
+    start_stream("bgm", -1, fade_ms=2000) # 循环播放，2秒淡入
 
 def stop_bgm_fadeout():
     pygame.mixer.music.fadeout(2000)
 
+# --------------------------------------------------------------------------
+# Surface LRU 缓存 (按 Surface 像素字节数计入预算，超出时淘汰最久未用的条目)
+# --------------------------------------------------------------------------
+
+class SurfaceLRU:
+    """按字节预算淘汰最久未使用条目的 Surface 缓存"""
+
+    def __init__(self, name, budget_bytes):
+        self.name = name
+        self.budget = budget_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        surface = self.entries.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface):
+        if key in self.entries:
+            self.bytes -= image_bytes(self.entries.pop(key))
+        self.entries[key] = surface
+        self.bytes += image_bytes(surface)
+        # 至少保留刚放入的条目
+        while self.bytes > self.budget and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= image_bytes(old)
+            self.evictions += 1
+
+    def remove_if(self, predicate):
+        for key in [k for k in self.entries if predicate(k)]:
+            self.bytes -= image_bytes(self.entries.pop(key))
+
+    def stats(self):
+        return (f"{self.name}: {len(self.entries)} 项 {self.bytes / (1024 * 1024):.1f} MB, "
+                f"命中 {self.hits} / 未命中 {self.misses}, 淘汰 {self.evictions}")
+
 # --------------------------------------------------------------------------
 # UI 绘制辅助函数 (修改：增加缓存以解决卡顿)
 # --------------------------------------------------------------------------
 
 # 全局文字表面缓存
-# Key: (content, style_type)
+# Key: (content, style_type, font)
 # Value: Rendered Surface (without alpha)
-_text_surface_cache = {}
+_text_surface_cache = SurfaceLRU("文字框缓存", TEXT_CACHE_MB * 1024 * 1024)
 
 def get_cached_text_box_surface(content, style, font=None):
     """
@@ -248,19 +682,21 @@ def get_cached_text_box_surface(content, style, font=None):
     use_font = font if font else game_font
 
     cache_key = (content, style, use_font)
-    if cache_key in _text_surface_cache:
-        return _text_surface_cache[cache_key]
+    cached = _text_surface_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
+    # 预热完成后仍需现画的文字说明登记表漏了它
+    if _text_warm_queue == [] and (content, style, use_font) not in UI_TEXTS:
+        print(f"警告: 文字未登记到 UI_TEXTS，游戏中现画: {content!r}")
+
     # --- 创建新的 Surface ---
     max_text_width = 1100 if style == "center_bottom" else 600
-    lines = wrap_text(content, use_font, max_text_width)
+    spans = layout_text(content, use_font, max_text_width)
     
     line_height = use_font.get_height()
-    total_text_h = len(lines) * line_height
-    total_text_w = 0
-    for line in lines:
-        w, _ = use_font.size(line)
-        total_text_w = max(total_text_w, w)
+    total_text_h = len(spans) * line_height
+    total_text_w = max(width for _, width in spans)
     
     # === 修改点开始 ===
     # 减小内边距数值 (原为 20 和 15)
@@ -276,62 +712,93 @@ def get_cached_text_box_surface(content, style, font=None):
     bg_rect = pygame.Rect(0, 0, box_w - 10, box_h)
     box_surface.fill(BOX_COLOR, bg_rect)
     
-    for i, line in enumerate(lines):
+    for i, (line, _) in enumerate(spans):
         line_y = padding_y + i * line_height
         line_x = padding_x
         draw_text_with_outline_and_shadow(box_surface, line, use_font, TEXT_COLOR, TEXT_OUTLINE_COLOR, (line_x, line_y), 1)
     
-    _text_surface_cache[cache_key] = box_surface
+    _text_surface_cache.put(cache_key, box_surface)
     return box_surface
 
+def recolor_text(text_surf, color):
+    """把白色渲染的文字改成 color (alpha 不变)，等同于用 color 重新渲染"""
+    if tuple(color[:3]) == (255, 255, 255):
+        return text_surf
+    colored = text_surf.copy()
+    colored.fill((color[0], color[1], color[2], 255), special_flags=pygame.BLEND_RGBA_MULT)
+    return colored
+
 def draw_text_with_outline_and_shadow(surface, text, font, color, outline_color, pos, outline_width=3):
-    """绘制带描边和投影的文字"""
-    text_surf = font.render(text, True, color)
+    """绘制带描边和投影的文字 (文字只光栅化一次，投影和描边由改色后的副本偏移绘制)"""
+    white_surf = font.render(text, True, WHITE)
+    text_surf = recolor_text(white_surf, color)
     
     # 投影 (Shadow)
-    shadow_surf = font.render(text, True, BLACK)
+    shadow_surf = recolor_text(white_surf, BLACK)
 
     shadow_angle = 135 
     surface.blit(shadow_surf, (pos[0] + 2, pos[1] + 2))
     
-    # 描边 (Outline) - 8方向绘制
-    for dx in range(-outline_width, outline_width + 1):
-        for dy in range(-outline_width, outline_width + 1):
-            if dx != 0 or dy != 0:
-                outline_surf = font.render(text, True, outline_color)
-                surface.blit(outline_surf, (pos[0] + dx, pos[1] + dy))
+    # 描边 (Outline) - 各方向偏移绘制同一张描边色副本
+    outline_surf = recolor_text(white_surf, outline_color)
+    surface.blits([(outline_surf, (pos[0] + dx, pos[1] + dy))
+                   for dx in range(-outline_width, outline_width + 1)
+                   for dy in range(-outline_width, outline_width + 1)
+                   if dx != 0 or dy != 0], doreturn=False)
     
     # 正常文字
     surface.blit(text_surf, pos)
     return text_surf.get_size()
 
-def wrap_text(text, font, max_width):
-    """简单的文字换行处理 (修改版：支持 \\n 强制换行)"""
-    words = text.split(' ')
-    lines = []
-    current_line = []
-    
-    for word in words:
-        # === 新增：检测手动换行符 ===
-        if '\n' in word:
-            parts = word.split('\n')
-            # 第一部分加到当前行
-            current_line.append(parts[0])
-            lines.append(' '.join(current_line))
-            # 第二部分作为新行的开始
-            current_line = [parts[1]] if parts[1] else []
-            continue
-        # ==========================
+# --------------------------------------------------------------------------
+# 文字排版：缓存每个 (字体, 单词) 的宽度，按行线性换行，\n 为强制换行
+# --------------------------------------------------------------------------
 
-        test_line = ' '.join(current_line + [word])
-        w, h = font.size(test_line)
-        if w < max_width:
-            current_line.append(word)
-        else:
-            lines.append(' '.join(current_line))
-            current_line = [word]
-    lines.append(' '.join(current_line))
-    return lines
+_word_widths = {} # (字体, 单词) -> (后接空格时的步进宽度, 单独渲染宽度)
+WORD_WIDTH_CACHE_LIMIT = 10000
+# 单词步进宽度相加与整行实际宽度的误差会随单词数累积：估算值低于
+# max_width - (LAYOUT_SLACK + LAYOUT_SLACK_PER_WORD * 已排单词数) 时直接排入，否则整行测量
+LAYOUT_SLACK = 16
+LAYOUT_SLACK_PER_WORD = 4
+
+def word_width(font, word):
+    widths = _word_widths.get((font, word))
+    if widths is None:
+        if len(_word_widths) >= WORD_WIDTH_CACHE_LIMIT:
+            _word_widths.clear()
+        widths = _word_widths[(font, word)] = (font.size(word + " ")[0], font.size(word)[0])
+    return widths
+
+def layout_text(text, font, max_width):
+    """把文字排成不超过 max_width 的行，返回 [(行文字, 行宽)]"""
+    spans = []
+    paragraphs = text.split("\n")
+    for i, paragraph in enumerate(paragraphs):
+        # 强制换行两侧的空格不保留，段内连续空格照原样保留
+        if i > 0:
+            paragraph = paragraph.lstrip(" ")
+        if i < len(paragraphs) - 1:
+            paragraph = paragraph.rstrip(" ")
+        line = []
+        line_advance = 0 # 已排单词 (各带一个空格) 的步进宽度之和
+        for word in paragraph.split(" "):
+            advance, width = word_width(font, word)
+            if line:
+                estimate = line_advance + width
+                slack = LAYOUT_SLACK + LAYOUT_SLACK_PER_WORD * len(line)
+                # 离边界较远时不测量；接近或超过边界时以整行实际宽度为准
+                if estimate >= max_width - slack and font.size(" ".join(line + [word]))[0] >= max_width:
+                    spans.append(line)
+                    line, line_advance = [], 0
+            line.append(word)
+            line_advance += advance
+        spans.append(line)
+    # 行宽取整行实际渲染宽度，每行只测量一次
+    return [(" ".join(words), font.size(" ".join(words))[0]) for words in spans]
+
+def wrap_text(text, font, max_width):
+    """文字换行 (支持 \n 强制换行)，返回各行文字"""
+    return [line for line, _ in layout_text(text, font, max_width)]
 
 def draw_styled_text_box(content, alpha, style="center_bottom", font=None, offset=(0, 0)):
     """
@@ -358,21 +825,162 @@ def draw_styled_text_box(content, alpha, style="center_bottom", font=None, offse
     box_surface.set_alpha(alpha)
     screen.blit(box_surface, (box_x, box_y))
 
+_level_title_cache = {} # 标题文字 -> 画好描边的 Surface
+
+def get_level_title_surface(content):
+    """关卡大标题的描边 Surface (首次使用时画好并缓存)"""
+    surf = _level_title_cache.get(content)
+    if surf is None:
+        # 创建 surface 以支持透明度
+        w, h = level_font.size(content)
+        # 留足空间给描边
+        surf = pygame.Surface((w + 20, h + 20), pygame.SRCALPHA)
+        
+        # 修正：颜色强制改为 WHITE
+        draw_text_with_outline_and_shadow(surf, content, level_font, WHITE, LEVEL_TITLE_OUTLINE, (10, 10), 1)
+        _level_title_cache[content] = surf
+    return surf
+
 def draw_level_text(content, alpha):
     """绘制关卡大标题 (Level X)"""
     if alpha <= 0: return
-    # 创建临时 surface 以支持透明度
-    w, h = level_font.size(content)
-    # 留足空间给描边
-    surf = pygame.Surface((w + 20, h + 20), pygame.SRCALPHA)
-    
-    # 修正：颜色强制改为 WHITE
-    draw_text_with_outline_and_shadow(surf, content, level_font, WHITE, LEVEL_TITLE_OUTLINE, (10, 10), 1)
+    surf = get_level_title_surface(content)
     
     surf.set_alpha(alpha)
     rect = surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 220)) # 位置稍微上调避开底部文字框
     screen.blit(surf, rect)
 
+# --------------------------------------------------------------------------
+# 静态文字登记表：启动后在空闲帧里预先画好，游戏过程中不再光栅化文字
+# --------------------------------------------------------------------------
+
+# (文字, 样式, 字体)，大致按出现顺序排列；新增文字框时要同步登记
+UI_TEXTS = [
+    ("click anywhere to continue", "bottom_left", ui_big_font),
+    ("Open and close the arms with mouse to raise and protect the flower!", "center_bottom", game_font),
+    ("Collect sunlight by opening your arms.", "center_bottom", game_font),
+    ("Close arms to prevent unwanted raindrop.", "center_bottom", game_font),
+    ("The flower's needs will change, so watch carefully!", "center_bottom", game_font),
+    ("Now you can focus on truly caring for this flower.", "center_bottom", game_font),
+    ("The seedling has been watered! Time for some sunlight!", "center_bottom", game_font),
+    ("The seed has turned into a bud.", "center_bottom", game_font),
+    ("You lost. The seed dies. Click to try again.", "center_bottom", game_font),
+    ("To make it bloom, give it plenty of sun and rain. But watch out for the sourrain!", "center_bottom", game_font),
+    ("The bud has turned into a flower.", "center_bottom", game_font),
+    ("You lost. The bud dies. Click to try again.", "center_bottom", game_font),
+    ("The fragile flower needs rain and sun. \n Protect it from both sourrain and crow droppings — listen for the caw and block quickly!", "center_bottom", game_font),
+    ("You lost. The flower dies. Click to try again.", "center_bottom", game_font),
+    ("Congratulations, your flower is already in full bloom!", "center_bottom", game_font),
+    ("Happy Ending", "bottom_left", ui_big_font),
+    ("The bird is coming!", "center_bottom", game_font), # draw_top_text
+]
+LEVEL_TITLES = ["Level 1", "Level 2", "Level 3"]
+TEXT_WARM_BUDGET_MS = 4 # 每帧最多花在预热文字上的时间
+
+_text_warm_queue = None # 尚未预热的 (文字, 样式, 字体)；None 表示还没开始
+_text_warm_start = 0.0
+
+def warm_text_cache(budget_ms=TEXT_WARM_BUDGET_MS):
+    """在帧预算内预先画好登记表里的文字，全部完成返回 True"""
+    global _text_warm_queue, _text_warm_start
+    if _text_warm_queue is None:
+        _text_warm_queue = list(UI_TEXTS) + [(title, "level", level_font) for title in LEVEL_TITLES]
+        _text_warm_start = time.perf_counter()
+    if not _text_warm_queue:
+        return True
+    deadline = time.perf_counter() + budget_ms / 1000
+    while _text_warm_queue and time.perf_counter() < deadline:
+        content, style, font = _text_warm_queue.pop(0)
+        if style == "level":
+            get_level_title_surface(content)
+        else:
+            get_cached_text_box_surface(content, style, font)
+    if not _text_warm_queue:
+        startup_metrics["text_warmed"] = (time.perf_counter() - _text_warm_start) * 1000
+        print(f"文字预热完成: {len(UI_TEXTS) + len(LEVEL_TITLES)} 项, 用时 {startup_metrics['text_warmed']:.0f} ms")
+    return not _text_warm_queue
+
+def check_ui_texts():
+    """检查源码中以字面量调用 draw_styled_text_box / draw_top_text / draw_level_text 的文字是否都已登记，
+    返回未登记的 (文字, 样式, 字体名) 列表 (python main.py --check-texts)"""
+    with open(__file__, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    registered = {(content, style, font) for content, style, font in UI_TEXTS}
+    missing = []
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.args
+                and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+            continue
+        content = node.args[0].value
+        if node.func.id == "draw_level_text":
+            if content not in LEVEL_TITLES:
+                missing.append((content, "level", "level_font"))
+            continue
+        if node.func.id == "draw_top_text":
+            style, font_name = "center_bottom", "game_font"
+        elif node.func.id == "draw_styled_text_box":
+            keywords = {kw.arg: kw.value for kw in node.keywords}
+            style_node = node.args[2] if len(node.args) > 2 else keywords.get("style")
+            font_node = node.args[3] if len(node.args) > 3 else keywords.get("font")
+            style = style_node.value if isinstance(style_node, ast.Constant) else "center_bottom"
+            font_name = font_node.id if isinstance(font_node, ast.Name) else "game_font"
+        else:
+            continue
+        if (content, style, globals()[font_name]) not in registered:
+            missing.append((content, style, font_name))
+    return missing
+
+# --------------------------------------------------------------------------
+# 字形图集：HUD 数字文字 (计时、倒计时、进度条数值) 用预渲染的字形拼接
+# --------------------------------------------------------------------------
+
+GLYPH_WORDS = ("Time:",) # 整词渲染，保留词内字距
+GLYPH_CHARS = "0123456789.s/ "
+
+_glyph_atlases = {} # (字体, 颜色) -> (图集, {字符或单词: (图集中的 Rect, 左侧伸出量, 步进宽度)})
+
+def get_glyph_atlas(font, color=WHITE):
+    atlas = _glyph_atlases.get((font, color))
+    if atlas is None:
+        pieces = [(piece, font.render(piece, True, color)) for piece in GLYPH_WORDS + tuple(GLYPH_CHARS)]
+        surface = pygame.Surface((sum(g.get_width() for _, g in pieces), max(g.get_height() for _, g in pieces)), pygame.SRCALPHA)
+        glyphs = {}
+        x = 0
+        for piece, glyph in pieces:
+            metrics = font.metrics(piece)
+            # 字形向左伸出笔位 (minx < 0) 时，渲染结果的左边缘在笔位左侧
+            bearing = min(0, metrics[0][0]) if metrics[0] else 0
+            advance = sum(m[4] for m in metrics if m)
+            glyphs[piece] = (surface.blit(glyph, (x, 0)), bearing, advance)
+            x += glyph.get_width()
+        atlas = _glyph_atlases[(font, color)] = (surface, glyphs)
+    return atlas
+
+def render_glyph_text(font, text, color=WHITE):
+    """用字形图集拼出一行文字；含有图集之外的字符时退回 font.render"""
+    surface, glyphs = get_glyph_atlas(font, color)
+    parts = []
+    pen = 0
+    i = 0
+    while i < len(text):
+        piece = next((w for w in GLYPH_WORDS if text.startswith(w, i)), text[i])
+        if piece not in glyphs:
+            return font.render(text, True, color)
+        rect, bearing, advance = glyphs[piece]
+        parts.append((rect, pen + bearing))
+        pen += advance
+        i += len(piece)
+    if not parts:
+        return font.render(text, True, color)
+    base = parts[0][1]
+    width = max(x - base + rect.width for rect, x in parts)
+    result = pygame.Surface((width, surface.get_height()), pygame.SRCALPHA)
+    # 相邻字形可能重叠，取两者较大值合并 (字形颜色一致，只有 alpha 不同)
+    result.blits([(surface, (x - base, 0), rect, pygame.BLEND_RGBA_MAX) for rect, x in parts], doreturn=False)
+    return result
+
+_hud_widgets = {} # HUD 控件 -> (上次显示的内容, 画好的 Surface...)
+
 def draw_progress_bar_custom(current, required, alpha, icon_key, x, y, width=350, height=20, is_damage=False):
     """
     绘制带图标的进度条
@@ -387,70 +995,90 @@ def draw_progress_bar_custom(current, required, alpha, icon_key, x, y, width=350
     icon_y = y + height // 2 - icon.get_height() // 2
     
     # 设置图标透明度
-    icon.set_alpha(alpha)
+    set_img_alpha(icon, alpha)
     screen.blit(icon, (icon_x, icon_y))
     
-    bar_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-    
     if is_damage:
         # --- 血条模式逻辑 ---
-        # 1. 绘制全灰背景 (代表已损失的血量/空槽)
-        pygame.draw.rect(bar_surf, DAMAGE_FILLED_COLOR, (0, 0, width, height), 0, 5) 
-        
-        # 2. 计算剩余血量 (红色)
+        # 计算剩余血量 (红色)
         # current 是 accumulated damage (已受伤害)
         # required 是 tolerance (最大承受伤害)
         damage_ratio = current / required
         remaining_ratio = 1.0 - damage_ratio
         remaining_ratio = max(0.0, min(1.0, remaining_ratio))
-        
-        red_width = int(width * remaining_ratio)
-        
-        # 3. 绘制红色条 (靠左对齐，代表剩余生命)
-        if red_width > 0:
-            pygame.draw.rect(bar_surf, (200, 50, 50), (0, 0, red_width, height), 0, 5)
-            
-        # 4. 边框
-        pygame.draw.rect(bar_surf, (255, 255, 255), (0, 0, width, height), 2, 5)
-        
+        fill_width = int(width * remaining_ratio)
+
         # 文字时间 (剩余可承受秒数)
         time_left_val = max(0, required - current)
         text_time = f"{time_left_val:.1f}s"
-        
+
     else: # 收集类 (阳光/雨水)
         progress_ratio = current / required
         progress_ratio = min(1.0, progress_ratio)
         fill_width = int(width * progress_ratio)
-        
-        fill_color = (255, 200, 0) if "sun" in icon_key else (50, 150, 255)
-        
-        # 背景 (深灰)
-        pygame.draw.rect(bar_surf, (70, 70, 70), (0, 0, width, height), 0, 5)
-        # 填充
-        pygame.draw.rect(bar_surf, fill_color, (0, 0, fill_width, height), 0, 5)
-        # 边框
-        pygame.draw.rect(bar_surf, (255, 255, 255), (0, 0, width, height), 2, 5)
-        
+
         # 修改：增加 's' 单位
         text_time = f"{current:.1f}s/{required:.0f}s"
 
+    # 显示的内容 (条长、0.1 秒精度的文字) 不变时复用上次画好的进度条和文字
+    widget = (icon_key, x, y, width, height, is_damage)
+    state = (fill_width, text_time)
+    cached = _hud_widgets.get(widget)
+    if cached is None or cached[0] != state:
+        cached = (state, render_progress_bar(icon_key, width, height, fill_width, is_damage), render_glyph_text(game_font, text_time))
+        _hud_widgets[widget] = cached
+    _, bar_surf, text_surf = cached
+
     bar_surf.set_alpha(alpha)
     screen.blit(bar_surf, (x, y))
 
     # 绘制数值文字 (右侧)
-    text_surf = game_font.render(text_time, True, WHITE)
     text_surf.set_alpha(alpha)
     screen.blit(text_surf, (x + width + 10, y + height // 2 - text_surf.get_height() // 2))
 
+def render_progress_bar(icon_key, width, height, fill_width, is_damage):
+    bar_surf = pygame.Surface((width, height), pygame.SRCALPHA)
+    
+    if is_damage:
+        # 1. 绘制全灰背景 (代表已损失的血量/空槽)
+        pygame.draw.rect(bar_surf, DAMAGE_FILLED_COLOR, (0, 0, width, height), 0, 5) 
+        
+        # 2. 绘制红色条 (靠左对齐，代表剩余生命)
+        if fill_width > 0:
+            pygame.draw.rect(bar_surf, (200, 50, 50), (0, 0, fill_width, height), 0, 5)
+            
+        # 3. 边框
+        pygame.draw.rect(bar_surf, (255, 255, 255), (0, 0, width, height), 2, 5)
+        
+    else:
+        fill_color = (255, 200, 0) if "sun" in icon_key else (50, 150, 255)
+        
+        # 背景 (深灰)
+        pygame.draw.rect(bar_surf, (70, 70, 70), (0, 0, width, height), 0, 5)
+        # 填充
+        pygame.draw.rect(bar_surf, fill_color, (0, 0, fill_width, height), 0, 5)
+        # 边框
+        pygame.draw.rect(bar_surf, (255, 255, 255), (0, 0, width, height), 2, 5)
+    return bar_surf
+
 
 def draw_game_timer(time_left, alpha):
-    text_surf = game_font.render(f"Time: {time_left:.1f}s", True, WHITE)
+    text = f"Time: {time_left:.1f}s"
+    cached = _hud_widgets.get("timer")
+    if cached is None or cached[0] != text:
+        cached = _hud_widgets["timer"] = (text, render_glyph_text(game_font, text))
+    text_surf = cached[1]
     text_surf.set_alpha(alpha)
     text_rect = text_surf.get_rect(topright=(SCREEN_WIDTH - 20, 20))
     screen.blit(text_surf, text_rect)
 
 def draw_level_number(level, alpha):
-    text_surf = game_font.render(f"Level {level}", True, WHITE)
+    text = f"Level {level}"
+    cached = _hud_widgets.get("level_number")
+    if cached is None or cached[0] != text:
+        # 关卡编号整关不变，直接整行渲染以保留字距
+        cached = _hud_widgets["level_number"] = (text, game_font.render(text, True, WHITE))
+    text_surf = cached[1]
     text_surf.set_alpha(alpha)
     text_rect = text_surf.get_rect(topleft=(20, 20))
     screen.blit(text_surf, text_rect)
@@ -461,42 +1089,687 @@ def draw_top_text(content, alpha):
 
 images = {}
 GLOBAL_SCALE_FACTOR = 0.5 
-all_keys = list(IMG_PATHS.keys())
 
-for key in all_keys:
-        img = load_img(key)
-        original_width = img.get_width()
-        original_height = img.get_height()
-        
-        # 图标不缩放，其他缩放
-        if "icon" in key:
-            images[key] = pygame.transform.scale(img, (40, 40))
-        else:
-            new_width = int(original_width * GLOBAL_SCALE_FACTOR)
-            new_height = int(original_height * GLOBAL_SCALE_FACTOR)
-            images[key] = pygame.transform.smoothscale(img, (new_width, new_height))
-        
-        # 如果是鸟屎图片，顺带旋转大约 25 度（逆时针旋转）以匹配斜向右下的轨迹
-        if key == "birdshit":
-            images[key] = pygame.transform.rotate(images[key], 25)
-
-if "t-f" in images:
-    flower_img = images["t-f"]
-    original_width = flower_img.get_width()
-    original_height = flower_img.get_height()
-    
-    new_width = int(original_width * (1 + 1/3))
-    new_height = int(original_height * (1 + 1/3))
-    
-    images["t-f"] = pygame.transform.smoothscale(flower_img, (new_width, new_height))
+# 由其他图片派生的预处理图片: key -> (源图片 key, 额外缩放比例)
+# 在 intro 中会以 2/3 大小显示 t-f (即 "2-f" 等大小)，提前生成缩放副本避免卡顿
+IMG_DERIVED = {
+    "t-f-intro-scaled": ("t-f", 2/3),
+}
+
+all_keys = list(IMG_PATHS.keys()) + list(IMG_DERIVED.keys())
+
+def get_img_ops(key):
+    """图片的预处理步骤列表 (同时作为磁盘缓存键的一部分)"""
+    if key in IMG_DERIVED:
+        source_key, ratio = IMG_DERIVED[key]
+        return get_img_ops(source_key) + [("smoothscale", ratio)]
+
+    # 图标不缩放，其他缩放
+    if "icon" in key:
+        ops = [("scale_to", (40, 40))]
+    else:
+        ops = [("smoothscale", GLOBAL_SCALE_FACTOR)]
     
-    # --- 修复卡顿关键：预先生成 Intro 用的缩放版花朵 ---
-    # 在 intro 中会以 2/3 大小显示 t-f (即 "2-f" 等大小)
-    # 我们这里提前生成一个 t-f 的缩放副本
-    intro_scale_ratio = 2/3
-    intro_w = int(images["t-f"].get_width() * intro_scale_ratio)
-    intro_h = int(images["t-f"].get_height() * intro_scale_ratio)
-    images["t-f-intro-scaled"] = pygame.transform.smoothscale(images["t-f"], (intro_w, intro_h))
+    # 如果是鸟屎图片，顺带旋转大约 25 度（逆时针旋转）以匹配斜向右下的轨迹
+    if key == "birdshit":
+        ops.append(("rotate", 25))
+
+    # 花朵 t-f 额外放大 1/3
+    if key == "t-f":
+        ops.append(("smoothscale", 1 + 1/3))
+    return ops
+
+def prepare_img(key, img):
+    """按资源规则缩放/旋转图片 (不依赖显示模式，可在后台线程调用)"""
+    for op, arg in get_img_ops(key):
+        if op == "scale_to":
+            img = pygame.transform.scale(img, arg)
+        elif op == "smoothscale":
+            new_width = int(img.get_width() * arg)
+            new_height = int(img.get_height() * arg)
+            img = pygame.transform.smoothscale(img, (new_width, new_height))
+        elif op == "rotate":
+            img = pygame.transform.rotate(img, arg)
+    return img
+
+def finish_img(key, img):
+    """主线程：转换为显示格式、裁掉透明边距并登记到 images"""
+    img = img.convert_alpha()
+    source_key = IMG_DERIVED[key][0] if key in IMG_DERIVED else key
+    if source_key in placeholder_imgs:
+        label_placeholder(source_key, img)
+    images[key] = classify_img(key, trim_img(key, img))
+
+    # 小图全部就绪后打包进图集
+    if key in ATLAS_KEYS and sprite_atlas is None and all(k in images for k in ATLAS_KEYS):
+        build_sprite_atlas()
+
+# --------------------------------------------------------------------------
+# 小图图集 (图标、雨滴、鸟屎、教学鼠标/箭头)
+# --------------------------------------------------------------------------
+
+ATLAS_KEYS = ["icon_sun", "icon_drop", "icon_heart", "t-raindrop", "sourraindrop", "birdshit", "t-m", "t-a"]
+ATLAS_WIDTH = 512
+ATLAS_PADDING = 1
+
+sprite_atlas = None # 打包后的图集 Surface
+atlas_rects = {} # key -> 图集中的源矩形
+
+def build_sprite_atlas():
+    """按行 (shelf) 打包小图，images 中的对应项替换为图集的子 Surface"""
+    global sprite_atlas
+    # 从高到低排序，减少每行浪费的高度
+    order = sorted(ATLAS_KEYS, key=lambda k: images[k].get_height(), reverse=True)
+    x, y, shelf_h = 0, 0, 0
+    rects = {}
+    for key in order:
+        w, h = images[key].get_size()
+        if x + w > ATLAS_WIDTH and x > 0:
+            x, y = 0, y + shelf_h + ATLAS_PADDING
+            shelf_h = 0
+        rects[key] = pygame.Rect(x, y, w, h)
+        x += w + ATLAS_PADDING
+        shelf_h = max(shelf_h, h)
+
+    atlas_w = max(max(r.right for r in rects.values()), 1)
+    atlas_h = y + shelf_h
+    atlas = pygame.Surface((atlas_w, atlas_h), pygame.SRCALPHA).convert_alpha()
+    atlas.fill((0, 0, 0, 0))
+    for key, rect in rects.items():
+        images[key].set_alpha(None)
+        atlas.blit(images[key], rect)
+
+    sprite_atlas = atlas
+    atlas_rects.update(rects)
+    for key, rect in rects.items():
+        # 子 Surface 共享图集像素，但各自保留独立的 alpha 设置
+        images[key] = atlas.subsurface(rect)
+
+# --------------------------------------------------------------------------
+# 透明边距裁剪：只保留不透明像素的包围盒，绘制时加回偏移
+# --------------------------------------------------------------------------
+
+image_offsets = {} # key -> 裁剪后左上角相对原图的偏移
+image_sizes = {}   # key -> 裁剪前的完整尺寸 (布局仍按完整尺寸计算)
+
+def trim_img(key, img):
+    """裁掉图片四周完全透明的像素；图集小图保持原样"""
+    image_offsets.pop(key, None)
+    image_sizes.pop(key, None)
+    if key in ATLAS_KEYS:
+        return img
+    rect = img.get_bounding_rect()
+    if rect.size == img.get_size() or rect.width == 0 or rect.height == 0:
+        return img
+    image_offsets[key] = rect.topleft
+    image_sizes[key] = img.get_size()
+    return img.subsurface(rect).copy()
+
+def img_width(key):
+    return image_sizes[key][0] if key in image_sizes else images[key].get_width()
+
+def img_height(key):
+    return image_sizes[key][1] if key in image_sizes else images[key].get_height()
+
+def blit_img(key, pos, alpha=255, target=None):
+    """按完整图片的位置以给定透明度绘制裁剪后的图片 (默认画到 screen)"""
+    img = images[key]
+    set_img_alpha(img, alpha)
+    offset_x, offset_y = image_offsets.get(key, (0, 0))
+    (target or screen).blit(img, (pos[0] + offset_x, pos[1] + offset_y))
+
+def scaled_img(key, ratio):
+    """按比例缩放裁剪后的图片 (结果缓存)，返回 (图片, 缩放后的偏移, 缩放后的完整尺寸)"""
+    img = images[key]
+    offset_x, offset_y = image_offsets.get(key, (0, 0))
+    scaled = get_transformed(key, (int(img.get_width() * ratio), int(img.get_height() * ratio)))
+    full_size = (int(img_width(key) * ratio), int(img_height(key) * ratio))
+    return scaled, (int(offset_x * ratio), int(offset_y * ratio)), full_size
+
+# --------------------------------------------------------------------------
+# 运行时变换缓存 (缩放/旋转结果，按字节预算 LRU 淘汰)
+# --------------------------------------------------------------------------
+
+transform_cache = SurfaceLRU("变换缓存", TRANSFORM_CACHE_MB * 1024 * 1024)
+
+def get_transformed(key, size=None, angle=0, smooth=True):
+    """images[key] 缩放到 size 再旋转 angle 度的结果，按 (图片, 尺寸, 角度, 滤波方式) 缓存"""
+    img = images[key]
+    cache_key = (key, id(img), size, angle, smooth)
+    result = transform_cache.get(cache_key)
+    if result is None:
+        result = img
+        if size is not None and size != img.get_size():
+            if smooth:
+                # smoothscale 会把颜色键颜色混进边缘，先转成逐像素 alpha
+                if result.get_colorkey() is not None:
+                    result = result.convert_alpha()
+                result = pygame.transform.smoothscale(result, size)
+            else:
+                result = pygame.transform.scale(result, size)
+        if angle:
+            result = pygame.transform.rotate(result, angle)
+        transform_cache.put(cache_key, result)
+    return result
+
+# --------------------------------------------------------------------------
+# 按 alpha 通道分类图片格式：不透明 / 颜色键 / 逐像素 alpha
+# --------------------------------------------------------------------------
+
+IMG_COLORKEY = (255, 0, 255)
+
+def classify_img(key, img):
+    """完全不透明的图片转为不带 alpha 的显示格式；只有全透明和全不透明像素的图片改用颜色键 + RLE；其余保留逐像素 alpha"""
+    if key in ATLAS_KEYS:
+        return img
+    area = img.get_width() * img.get_height()
+    solid = pygame.mask.from_surface(img, 254).count()
+    if solid == area:
+        return img.convert()
+    visible = pygame.mask.from_surface(img, 0).count()
+    # 图片本身用到了颜色键颜色时不能改用颜色键
+    if visible == solid and pygame.mask.from_threshold(img, IMG_COLORKEY + (255,), (1, 1, 1, 255)).count() == 0:
+        keyed = pygame.Surface(img.get_size()).convert()
+        keyed.fill(IMG_COLORKEY)
+        keyed.blit(img, (0, 0))
+        keyed.set_colorkey(IMG_COLORKEY, pygame.RLEACCEL)
+        return keyed
+    return img
+
+def has_pixel_alpha(img):
+    # 设置过表面 alpha 后 get_flags() 也会带上 SRCALPHA，要看像素格式里有没有 alpha 通道
+    return img.get_masks()[3] != 0
+
+def img_format(img):
+    if has_pixel_alpha(img):
+        return "alpha"
+    return "colorkey" if img.get_colorkey() is not None else "opaque"
+
+def set_img_alpha(img, alpha):
+    """设置表面透明度；不带逐像素 alpha 的图片在完全不透明时关闭混合，直接拷贝像素"""
+    if alpha >= 255 and not has_pixel_alpha(img):
+        img.set_alpha(None)
+    else:
+        img.set_alpha(alpha)
+
+# --------------------------------------------------------------------------
+# 全屏特效：纯色滤镜图层按颜色预分配，之后只改表面 alpha
+# (用 BLEND_MULT/BLEND_ADD 直接填充屏幕做淡入淡出实测约 11 ms，比预分配图层的 alpha 绘制慢十倍以上)
+# --------------------------------------------------------------------------
+
+SOUR_RAIN_TINT = ((140, 160, 60), 100) # 酸雨滤镜 (颜色, alpha)
+COUNTDOWN_DIM = ((128, 128, 128), 150) # 倒计时变暗
+
+_overlays = {} # 颜色 -> 全屏纯色图层
+
+def get_overlay(color, alpha):
+    """取预分配的全屏纯色图层并设置透明度"""
+    overlay = _overlays.get(color)
+    if overlay is None:
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        overlay.fill(color)
+        _overlays[color] = overlay
+    set_img_alpha(overlay, alpha)
+    return overlay
+
+def draw_overlay(color, alpha, target=None):
+    if alpha > 0:
+        (target or screen).blit(get_overlay(color, alpha), (0, 0))
+
+class ParticleStore:
+    """雨滴 / 酸雨滴粒子：x、y、speed 各存一个数组 (结构数组)，有 numpy 时整批更新"""
+
+    def __init__(self, use_numpy=np is not None):
+        self.np = np if use_numpy else None
+        if self.np is not None:
+            self.rng = np.random.default_rng()
+        self.clear()
+
+    def clear(self):
+        if self.np is not None:
+            self.x = self.np.empty(0)
+            self.y = self.np.empty(0)
+            self.speed = self.np.empty(0)
+        else:
+            self.x = []
+            self.y = []
+            self.speed = []
+
+    def __len__(self):
+        return len(self.x)
+
+    def spawn(self, max_count, chance=0.1):
+        """每个空位以 chance 的概率在屏幕上方生成一个粒子"""
+        free = max_count - len(self)
+        if free <= 0:
+            return
+        if self.np is not None:
+            count = int(self.rng.binomial(free, chance))
+            if count:
+                self.x = self.np.concatenate((self.x, self.rng.integers(0, SCREEN_WIDTH, count, endpoint=True)))
+                self.y = self.np.concatenate((self.y, self.rng.integers(-SCREEN_HEIGHT // 4, 0, count, endpoint=True)))
+                self.speed = self.np.concatenate((self.speed, self.rng.uniform(RAINDROP_SPEED_MIN, RAINDROP_SPEED_MAX, count)))
+        else:
+            for _ in range(free):
+                if random.random() < chance:
+                    self.x.append(random.randint(0, SCREEN_WIDTH))
+                    self.y.append(random.randint(-SCREEN_HEIGHT // 4, 0))
+                    self.speed.append(random.uniform(RAINDROP_SPEED_MIN, RAINDROP_SPEED_MAX))
+
+    def update(self):
+        """下落一帧，移除落出屏幕的粒子"""
+        limit = SCREEN_HEIGHT + 20
+        if self.np is not None:
+            self.y += self.speed
+            keep = self.y < limit
+            if not keep.all():
+                self.x, self.y, self.speed = self.x[keep], self.y[keep], self.speed[keep]
+        else:
+            self.y = list(map(operator.add, self.y, self.speed))
+            if self.y and max(self.y) >= limit:
+                keep = list(map(float(limit).__gt__, self.y))
+                self.x = list(compress(self.x, keep))
+                self.y = list(compress(self.y, keep))
+                self.speed = list(compress(self.speed, keep))
+
+    def positions(self):
+        if self.np is not None:
+            return zip(self.x.tolist(), self.y.tolist())
+        return zip(self.x, self.y)
+
+def draw_particles(key, drops, alpha=255):
+    """同一张图片的全部粒子 (雨滴 / 酸雨滴) 一次 blits 批量提交"""
+    if not drops:
+        return
+    img = images[key]
+    set_img_alpha(img, alpha)
+    screen.blits([(img, pos) for pos in drops.positions()], doreturn=False)
+
+# --------------------------------------------------------------------------
+# 关卡游戏阶段的静态背景缓存：背景 + 花朵合成一次，天气/倒计时滤镜再叠一层
+# --------------------------------------------------------------------------
+
+_backdrop = {"key": None, "under": None, "full": None} # under / full 只分配一次，内容变化时原地重画
+
+def backdrop_layers(weather, counting_down):
+    """画在手臂之上的全屏图层 [(图片, 偏移)]"""
+    if counting_down:
+        weather = "sunny"
+    layers = []
+    if weather in ("sunny", "rainy"):
+        key = "t-" + weather
+        img = images[key]
+        set_img_alpha(img, 255)
+        layers.append((img, image_offsets.get(key, (0, 0))))
+    elif weather == "sourrain":
+        layers.append((get_overlay(*SOUR_RAIN_TINT), (0, 0)))
+    if counting_down:
+        layers.append((get_overlay(*COUNTDOWN_DIM), (0, 0)))
+    return layers
+
+def get_backdrop(flower_key, flower_pos, layers):
+    """返回 (背景 + 花朵, 再叠上 layers 的完整背景)，只在天气、花朵或其位置变化时重建 (背景和花朵须已完全显示)"""
+    key = (id(images["t-1"]), id(images[flower_key]), flower_pos,
+           tuple((id(img), offset) for img, offset in layers))
+    if _backdrop["key"] != key:
+        under, full = _backdrop["under"], _backdrop["full"]
+        if under is None:
+            under = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            full = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        under.fill(BLACK)
+        blit_img("t-1", (0, 0), target=under)
+        blit_img(flower_key, flower_pos, target=under)
+        full.blit(under, (0, 0))
+        for img, offset in layers:
+            full.blit(img, offset)
+        _backdrop.update(key=key, under=under, full=full)
+    return _backdrop["under"], _backdrop["full"]
+
+def draw_gameplay_backdrop(flower_key, flower_pos, weather, counting_down, arms):
+    """关卡游戏阶段：一次绘制缓存的完整背景，手臂所在区域用底层重画后再盖上天气图层"""
+    layers = backdrop_layers(weather, counting_down)
+    if alphas["t-1"] < 255 or alphas[flower_key] < 255:
+        # 开局倒计时期间背景和花朵仍在淡入，每帧都不同：直接画到屏幕，不重建缓存
+        screen.fill(BLACK)
+        for key, pos in [("t-1", (0, 0)), (flower_key, flower_pos)] + arms:
+            if alphas[key] > 0:
+                blit_img(key, pos, alphas[key])
+        for img, offset in layers:
+            screen.blit(img, offset)
+        return
+    under, full = get_backdrop(flower_key, flower_pos, layers)
+    screen.blit(full, (0, 0))
+
+    arm_rects = []
+    for key, pos in arms:
+        if alphas[key] > 0:
+            offset_x, offset_y = image_offsets.get(key, (0, 0))
+            arm_rects.append((key, pos, pygame.Rect((pos[0] + offset_x, pos[1] + offset_y), images[key].get_size())))
+    # 两只手臂靠得很近时合并成一个区域，避免后画的区域盖掉先画的手臂
+    screen_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+    for region in merge_rects([rect for _, _, rect in arm_rects]):
+        region = region.clip(screen_rect)
+        if region.width == 0 or region.height == 0:
+            continue
+        screen.blit(under, region.topleft, region)
+        for key, pos, rect in arm_rects:
+            if region.colliderect(rect):
+                blit_img(key, pos, alphas[key])
+        for img, (offset_x, offset_y) in layers:
+            screen.blit(img, region.topleft, region.move(-offset_x, -offset_y))
+
+# --------------------------------------------------------------------------
+# 图层遮挡剔除：完全不透明且铺满屏幕的图层下面的内容不再绘制
+# --------------------------------------------------------------------------
+
+def covers_screen(key, pos):
+    """图片以 alpha 255 绘制在 pos 时是否把整个屏幕完全盖住"""
+    img = images[key]
+    if alphas[key] < 255 or img_format(img) != "opaque":
+        return False
+    offset_x, offset_y = image_offsets.get(key, (0, 0))
+    rect = pygame.Rect((pos[0] + offset_x, pos[1] + offset_y), img.get_size())
+    return rect.contains(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+def draw_layers(layers):
+    """按顺序绘制 [(key, 位置)]，从最上面一个盖住全屏的图层开始画"""
+    first = 0
+    for i, (key, pos) in enumerate(layers):
+        if covers_screen(key, pos):
+            first = i
+    for key, pos in layers[first:]:
+        if alphas[key] > 0:
+            blit_img(key, pos, alphas[key])
+
+# --------------------------------------------------------------------------
+# 预处理图片磁盘缓存 (跳过 PNG 解码与缩放)
+# --------------------------------------------------------------------------
+
+_IMG_CACHE_HEADER = struct.Struct("<4sII") # 魔数, 宽, 高
+_IMG_CACHE_MAGIC = b"MFI1"
+
+def get_img_cache_path(key):
+    """缓存文件路径；键由源文件路径、修改时间、大小和预处理步骤决定。源文件不存在时返回 None"""
+    source_key = IMG_DERIVED[key][0] if key in IMG_DERIVED else key
+    path = IMG_PATHS[source_key]
+    if asset_bundle is not None:
+        entry = bundle_entry("images", source_key)
+        if entry is None:
+            return None
+        source_ident = f"bundle|{entry[1]}|{entry[2]}"
+    else:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        source_ident = f"{st.st_mtime_ns}|{st.st_size}"
+    ident = f"{path}|{source_ident}|{get_img_ops(key)!r}"
+    digest = hashlib.sha1(ident.encode("utf-8")).hexdigest()
+    return os.path.join(IMAGE_CACHE_DIR, f"{key}-{digest[:16]}.raw")
+
+def read_img_cache(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # 截断的缓存文件视为未命中，重新生成后覆盖
+    if len(data) < _IMG_CACHE_HEADER.size:
+        return None
+    magic, w, h = _IMG_CACHE_HEADER.unpack_from(data)
+    if magic != _IMG_CACHE_MAGIC or len(data) != _IMG_CACHE_HEADER.size + w * h * 4:
+        return None
+    return pygame.image.frombuffer(memoryview(data)[_IMG_CACHE_HEADER.size:], (w, h), "RGBA")
+
+def write_img_cache(cache_path, img):
+    try:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_IMG_CACHE_HEADER.pack(_IMG_CACHE_MAGIC, img.get_width(), img.get_height()))
+            f.write(pygame.image.tobytes(img, "RGBA"))
+        os.replace(tmp_path, cache_path)
+        remove_stale_cache_files(cache_path)
+    except OSError as e:
+        print(f"提示: 无法写入图片缓存 {cache_path}: {e}")
+
+def decode_img(key):
+    """工作线程：优先读取磁盘缓存，否则解码并缩放一张图片"""
+    cache_path = get_img_cache_path(key) if USE_IMAGE_CACHE else None
+    if cache_path:
+        img = read_img_cache(cache_path)
+        if img is not None:
+            return key, img
+    source_key = IMG_DERIVED[key][0] if key in IMG_DERIVED else key
+    img = prepare_img(key, load_img(source_key))
+    if cache_path:
+        write_img_cache(cache_path, img)
+    return key, img
+
+# 图片解码线程池 (pygame 解码与 smoothscale 期间会释放 GIL)
+_asset_pool = None
+
+def get_asset_pool():
+    global _asset_pool
+    if _asset_pool is None:
+        _asset_pool = ThreadPoolExecutor(max_workers=ASSET_WORKERS, thread_name_prefix="asset")
+    return _asset_pool
+
+def load_images(keys):
+    """并行解码缩放一组图片，并在主线程转换为显示格式"""
+    if len(keys) <= 1:
+        for key in keys:
+            finish_img(*decode_img(key))
+        return
+    futures = [get_asset_pool().submit(decode_img, key) for key in keys]
+    for future in as_completed(futures):
+        finish_img(*future.result())
+
+# --------------------------------------------------------------------------
+# 后台加载器 (渐进式启动与场景预取共用)
+# --------------------------------------------------------------------------
+
+_loaded_img_queue = queue.Queue() # 线程池处理好的图片 (key, surface, future)
+_pending_imgs = {} # 正在后台处理的图片: key -> Future
+_sound_loader = None
+_sound_loader_stop = threading.Event() # 退出时置位，后台音效线程在两个片段之间检查
+startup_metrics = {} # 启动耗时统计 (毫秒)
+frame_stats = {} # 步骤 -> [帧数, 绘制总耗时 (秒)]，只统计 PROFILE_STEPS
+
+def _queue_loaded_img(future):
+    if future.cancelled(): # 退出时 stop_loaders 取消的请求
+        return
+    key, img = future.result()
+    _loaded_img_queue.put((key, img, future))
+
+def request_images(keys):
+    """把尚未加载的图片提交给线程池 (不阻塞)"""
+    for key in keys:
+        if key in images or key in _pending_imgs:
+            continue
+        future = get_asset_pool().submit(decode_img, key)
+        _pending_imgs[key] = future
+        future.add_done_callback(_queue_loaded_img)
+
+def _accept_loaded_img(key, img, future):
+    # 只登记仍在等待中的那一次请求，避免重复转换
+    if _pending_imgs.get(key) is future:
+        del _pending_imgs[key]
+        finish_img(key, img)
+
+def pump_loaded_images():
+    """主线程每帧调用：把后台已处理好的图片转换为显示格式"""
+    while True:
+        try:
+            item = _loaded_img_queue.get_nowait()
+        except queue.Empty:
+            break
+        _accept_loaded_img(*item)
+    if PROGRESSIVE_STARTUP and not _pending_imgs and "images_loaded" not in startup_metrics:
+        startup_metrics["images_loaded"] = (time.perf_counter() - APP_START_TIME) * 1000
+        print(f"后台图片加载完成: {startup_metrics['images_loaded']:.0f} ms")
+
+def ensure_images(keys):
+    """阻塞直到这些图片都已登记到 images"""
+    request_images(keys)
+    for key in keys:
+        future = _pending_imgs.get(key)
+        if future is not None:
+            _accept_loaded_img(*future.result(), future)
+    pump_loaded_images()
+
+def _background_load_sounds():
+    """后台线程：按优先级加载常驻音效，流式片段只检查文件是否存在"""
+    for key in sound_load_order():
+        if _sound_loader_stop.is_set():
+            return
+        sounds[key] = load_sound(key, SOUND_PATHS[key])
+    for key, path in SOUND_PATHS.items():
+        if sound_policy[key] == "stream" and not sound_available(key):
+            print(f"警告: 音频文件 {path} 未找到")
+    startup_metrics["sounds_loaded"] = (time.perf_counter() - APP_START_TIME) * 1000
+    print(f"后台音效加载完成: {startup_metrics['sounds_loaded']:.0f} ms")
+
+def start_sound_loader():
+    global _sound_loader
+    _sound_loader = threading.Thread(target=_background_load_sounds, daemon=True)
+    _sound_loader.start()
+
+def stop_loaders():
+    """pygame.quit() 之前调用：停止后台音效线程和图片线程池并等待它们结束 (混音器关闭后不能再读写 Sound)"""
+    _sound_loader_stop.set()
+    if _sound_loader is not None:
+        _sound_loader.join()
+    if _asset_pool is not None:
+        _asset_pool.shutdown(wait=True, cancel_futures=True)
+
+# --------------------------------------------------------------------------
+# 场景资源常驻管理 (预取下一场景，超出预算时释放已结束场景的图片)
+# --------------------------------------------------------------------------
+
+# 各场景对应的步骤范围
+SCENE_STEPS = {
+    "opening": (1, 8),
+    "tutorial": (9, 15),
+    "level1": (16, 20),
+    "level2": (21, 26),
+    "level3": (27, 32),
+    "ending": (33, 34),
+}
+
+# 各场景绘制时用到的图片
+SCENE_ASSETS = {
+    "opening": ["1", "2-1", "2-2", "3-1", "3-2", "4", "5-1", "5-2", "5-3", "5-4", "5-5"],
+    "tutorial": ["t-1", "t-f", "t-l", "t-r", "t-m", "t-a", "t-sunny", "t-rainy", "t-raindrop",
+                 "icon_sun", "icon_heart"],
+    "level1": ["1-sunny", "1-rainy", "t-raindrop", "t-f-intro-scaled", "t-1", "t-f", "t-l", "t-r",
+               "t-sunny", "t-rainy", "icon_sun", "icon_heart", "2-f", "1-baselose", "1-f-l"],
+    "level2": ["1-sunny", "1-rainy", "1-sourrain", "t-raindrop", "sourraindrop", "2-f", "t-1", "t-l", "t-r",
+               "t-sunny", "t-rainy", "icon_sun", "icon_drop", "icon_heart", "3-f", "1-baselose", "2-f-l"],
+    "level3": ["1-sunny", "1-rainy", "1-sourrain", "t-raindrop", "sourraindrop", "birdshit", "3-f", "t-1",
+               "t-l", "t-r", "t-sunny", "t-rainy", "icon_sun", "icon_drop", "icon_heart", "1-baselose", "3-f-l"],
+    "ending": ["E-1", "E-2"],
+}
+SCENE_ORDER = list(SCENE_STEPS.keys())
+BACKDROP_SCENES = ("level1", "level2", "level3") # 用 draw_gameplay_backdrop 绘制的场景
+
+current_scene = None
+
+def scene_for_step(step):
+    for scene, (first, last) in SCENE_STEPS.items():
+        if first <= step <= last:
+            return scene
+    return None
+
+def image_bytes(img):
+    return img.get_width() * img.get_height() * img.get_bytesize()
+
+def resident_image_bytes():
+    """当前常驻图片总字节数 (图集只计一次，含关卡背景缓存)"""
+    total = sum(image_bytes(img) for key, img in images.items() if key not in atlas_rects)
+    if _backdrop["under"] is not None:
+        total += image_bytes(_backdrop["under"]) + image_bytes(_backdrop["full"])
+    if sprite_atlas is not None:
+        total += image_bytes(sprite_atlas)
+    return total
+
+def asset_residency_report():
+    """各场景常驻图片字节数，共用的图片会计入每个用到它的场景"""
+    report = {}
+    for scene, keys in SCENE_ASSETS.items():
+        report[scene] = sum(image_bytes(images[k]) for k in set(keys) if k in images and k not in atlas_rects)
+    report["total"] = resident_image_bytes()
+    return report
+
+def evict_images(keep_scenes):
+    """释放不属于 keep_scenes 的图片 (已结束的场景)，重新进入时从磁盘缓存再加载"""
+    keep = set(ATLAS_KEYS)
+    for scene in keep_scenes:
+        keep.update(SCENE_ASSETS[scene])
+    for key in [k for k in images if k not in keep]:
+        del images[key]
+        transform_cache.remove_if(lambda cache_key: cache_key[0] == key)
+    # 还在后台处理的预取也作废，完成后 _accept_loaded_img 不再登记
+    for key in [k for k in _pending_imgs if k not in keep]:
+        _pending_imgs.pop(key).cancel()
+    # 以下缓存只在当前场景绘制时生成，场景切换时上一个场景已被释放，一并清掉
+    _hud_widgets.clear()
+    # 关卡背景的两张全屏目标 (约 7 MB) 在关卡之间复用，离开关卡后才释放
+    _backdrop["key"] = None
+    if not any(scene in BACKDROP_SCENES for scene in keep_scenes):
+        _backdrop.update(under=None, full=None)
+
+def record_frame_time(step, seconds):
+    if step in PROFILE_STEPS:
+        stats = frame_stats.setdefault(step, [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+
+def report_frame_stats():
+    for step, (frames, total) in sorted(frame_stats.items()):
+        print(f"步骤 {step}: {frames} 帧，平均绘制 {total / frames * 1000:.2f} ms")
+
+def update_asset_residency(step):
+    """每帧绘制前调用：保证当前步骤需要的图片已加载，场景切换时预取与释放"""
+    global current_scene
+    scene = scene_for_step(step)
+    if scene is None:
+        return
+    required = STARTUP_IMAGE_KEYS if step == 1 else SCENE_ASSETS[scene]
+    if any(key not in images for key in required):
+        ensure_images(required)
+
+    if scene != current_scene:
+        current_scene = scene
+        keep_scenes = [scene]
+        scene_index = SCENE_ORDER.index(scene)
+        if scene_index + 1 < len(SCENE_ORDER):
+            keep_scenes.append(SCENE_ORDER[scene_index + 1])
+        evict_images(keep_scenes)
+        # 预算只决定是否提前预取下一场景，超出时下一场景在进入时再加载
+        if len(keep_scenes) > 1 and resident_image_bytes() > ASSET_MEMORY_BUDGET_MB * 1024 * 1024:
+            print(f"资源常驻: 超出预算 {ASSET_MEMORY_BUDGET_MB} MB，不预取 {keep_scenes[1]}")
+            keep_scenes.pop()
+        for keep_scene in keep_scenes:
+            request_images(SCENE_ASSETS[keep_scene])
+
+        report = asset_residency_report()
+        mb = 1024 * 1024
+        detail = ", ".join(f"{s} {report[s] / mb:.1f}" for s in SCENE_ORDER if report[s])
+        print(f"资源常驻: 进入 {scene}，共 {report['total'] / mb:.1f} MB ({detail})")
+        if transform_cache.entries:
+            print(transform_cache.stats())
+
+# --check-texts / --bench 只按需加载自己用到的资源，不启动后台加载
+TOOL_MODE = __name__ == "__main__" and ("--check-texts" in sys.argv or "--bench" in sys.argv)
+
+if not TOOL_MODE:
+    if PROGRESSIVE_STARTUP:
+        load_images(STARTUP_IMAGE_KEYS)
+        request_images(SCENE_ASSETS["opening"] + SCENE_ASSETS["tutorial"] + ATLAS_KEYS)
+    else:
+        load_images(all_keys)
+    start_sound_loader()
 
 # ==========================================
 # 3. 游戏状态管理
@@ -560,7 +1833,7 @@ is_dropping = False
 sunlight_timer = 0.0 
 damage_accumulated = 0.0 
 rain_phase_time = 0.0 
-raindrops = [] 
+raindrops = ParticleStore()
 
 # Level 1 Vars
 level1_sunlight_collected = 0.0
@@ -580,7 +1853,7 @@ level2_weather = "sunny"
 level2_weather_timer = 0.0
 level2_weather_duration = random.uniform(WEATHER_MIN_DURATION, WEATHER_MAX_DURATION)
 level2_game_active = False
-sourraindrops = [] 
+sourraindrops = ParticleStore()
 
 # Level 3 Vars
 level3_sunlight_collected = 0.0
@@ -620,29 +1893,29 @@ def update_environment_sound(weather):
     if current_environment_sound != target_sound:
         # 淡出当前声音
         if current_environment_sound == "rainy":
-            sounds["rainy"].fadeout(1000)
+            fadeout_clip("rainy", 1000)
         elif current_environment_sound == "sourrain":
-            sounds["sourrain"].fadeout(1000)
+            fadeout_clip("sourrain", 1000)
             
         # 淡入新声音
         if target_sound == "rainy":
-            sounds["rainy"].play(-1, fade_ms=1000)
+            play_clip("rainy", -1, fade_ms=1000)
         elif target_sound == "sourrain":
-            sounds["sourrain"].play(-1, fade_ms=1000)
+            play_clip("sourrain", -1, fade_ms=1000)
             
         current_environment_sound = target_sound
 
 def stop_all_environment_sounds():
     global current_environment_sound
     if current_environment_sound == "rainy":
-        sounds["rainy"].fadeout(1000)
+        fadeout_clip("rainy", 1000)
     elif current_environment_sound == "sourrain":
-        sounds["sourrain"].fadeout(1000)
+        fadeout_clip("sourrain", 1000)
     current_environment_sound = None
 
 def reset_tutorial_state():
     global step, state_start_time, arm_position_offset, mouse_anim_offset, has_slid, slide_time
-    global sunlight_timer, damage_accumulated, rain_phase_time, is_restarting, raindrops
+    global sunlight_timer, damage_accumulated, rain_phase_time, is_restarting
     
     step = 9
     state_start_time = pygame.time.get_ticks() 
@@ -660,12 +1933,12 @@ def reset_tutorial_state():
     damage_accumulated = 0.0 
     rain_phase_time = 0.0
     is_restarting = False 
-    raindrops = []
+    raindrops.clear()
     stop_all_environment_sounds()
 
 def reset_level1():
     global level1_sunlight_collected, level1_rain_damage, level1_time_left, level1_weather
-    global level1_weather_timer, level1_weather_duration, level1_game_active, raindrops
+    global level1_weather_timer, level1_weather_duration, level1_game_active
     global is_counting_down
     
     level1_sunlight_collected = 0.0
@@ -676,13 +1949,13 @@ def reset_level1():
     level1_weather_duration = random.uniform(WEATHER_MIN_DURATION, WEATHER_MAX_DURATION)
     level1_game_active = False
     is_counting_down = False
-    raindrops = []
+    raindrops.clear()
     stop_all_environment_sounds()
 
 def reset_level2():
     global level2_sunlight_collected, level2_rain_collected, level2_sourrain_damage, level2_time_left
     global level2_weather, level2_weather_timer, level2_weather_duration, level2_game_active
-    global raindrops, sourraindrops, is_counting_down
+    global is_counting_down
     
     level2_sunlight_collected = 0.0
     level2_rain_collected = 0.0
@@ -693,14 +1966,14 @@ def reset_level2():
     level2_weather_duration = random.uniform(WEATHER_MIN_DURATION, WEATHER_MAX_DURATION)
     level2_game_active = False
     is_counting_down = False
-    raindrops = []
-    sourraindrops = []
+    raindrops.clear()
+    sourraindrops.clear()
     stop_all_environment_sounds()
 
 def reset_level3():
     global level3_sunlight_collected, level3_rain_collected, level3_sourrain_damage, level3_time_left
     global level3_weather, level3_weather_timer, level3_weather_duration, level3_game_active
-    global raindrops, sourraindrops, bird_active, bird_y, bird_checked, bird_warning_timer
+    global bird_active, bird_y, bird_checked, bird_warning_timer
     global level3_bird_finished, is_counting_down
     
     level3_sunlight_collected = 0.0
@@ -712,8 +1985,8 @@ def reset_level3():
     level3_weather_duration = 6.0 # Initial Sunny fixed 5s
     level3_game_active = False
     is_counting_down = False
-    raindrops = []
-    sourraindrops = []
+    raindrops.clear()
+    sourraindrops.clear()
     bird_active = False
     bird_y = 0.0
     bird_checked = False
@@ -742,10 +2015,273 @@ def finalize_restart():
     # 教学关卡14是雨天，开始下雨音效
     update_environment_sound("rainy")
 
+# --------------------------------------------------------------------------
+# 脏矩形渲染：绘制阶段先记录指令，与上一帧比较后只重绘并提交变化的区域
+# --------------------------------------------------------------------------
+
+class DisplayList:
+    """绘制阶段代替 screen 的记录器，只记录 blit / fill 指令"""
+
+    def __init__(self, size):
+        self.bounds = pygame.Rect((0, 0), size)
+        self.ops = []
+        self._tokens = {}
+
+    def _surface_token(self, source):
+        # 同一帧内同一张图片 (如雨滴) 只计算一次
+        key = (id(source), source.get_alpha())
+        token = self._tokens.get(key)
+        if token is None:
+            if source.get_width() * source.get_height() <= DIRTY_HASH_PIXELS:
+                # 每帧新建的小图 (文字、进度条、缩放后的花) 按像素内容比较
+                token = (source.get_size(), zlib.crc32(source.get_buffer()))
+            else:
+                token = id(source)
+            token = (token, source.get_alpha(), source.get_colorkey())
+            self._tokens[key] = token
+        return token
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        size = pygame.Rect(area).size if area is not None else source.get_size()
+        pos = dest.topleft if isinstance(dest, pygame.Rect) else dest
+        # 坐标可能是小数，多留 1 像素
+        rect = pygame.Rect(pos, size).inflate(2, 2).clip(self.bounds)
+        self.ops.append(("blit", source, dest, area, special_flags, source.get_alpha(), rect,
+                         ("blit", self._surface_token(source), special_flags)))
+        return rect
+
+    def blits(self, blit_sequence, doreturn=True):
+        # 粒子每帧都在移动，整批记成一条指令，脏矩形取它们的外接矩形
+        seq = list(blit_sequence)
+        if not seq:
+            return [] if doreturn else None
+        sources = list(dict.fromkeys(item[0] for item in seq))
+        xs = [item[1][0] for item in seq]
+        ys = [item[1][1] for item in seq]
+        w = max(source.get_width() for source in sources)
+        h = max(source.get_height() for source in sources)
+        rect = pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + w, max(ys) - min(ys) + h).inflate(2, 2).clip(self.bounds)
+        alphas = [(source, source.get_alpha()) for source in sources]
+        self.ops.append(("blits", alphas, seq, None, 0, None, rect,
+                         ("blits", tuple(self._surface_token(source) for source in sources),
+                          tuple(item[1:] for item in seq))))
+        if doreturn:
+            return [pygame.Rect(item[1], item[0].get_size()).clip(self.bounds) for item in seq]
+
+    def fill(self, color, rect=None, special_flags=0):
+        rect = self.bounds.copy() if rect is None else pygame.Rect(rect).clip(self.bounds)
+        self.ops.append(("fill", color, rect, None, special_flags, None, rect,
+                         ("fill", tuple(pygame.Color(color)), special_flags)))
+        return rect
+
+def replay_ops(target, ops, clip=None):
+    for kind, source, dest, area, flags, alpha, rect, _ in ops:
+        if clip is not None and not clip.colliderect(rect):
+            continue
+        if kind == "fill":
+            target.fill(source, dest, flags)
+        elif kind == "blits":
+            for surface, surface_alpha in source:
+                surface.set_alpha(surface_alpha)
+            target.blits(dest, doreturn=False)
+        else:
+            # 同一张图片可能在一帧内以不同透明度绘制多次
+            source.set_alpha(alpha)
+            target.blit(source, dest, area, flags)
+
+def merge_rects(rects):
+    """合并相交的矩形"""
+    merged = []
+    for rect in rects:
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect = rect.union(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+_previous_frame = None
+
+def invalidate_frame():
+    """窗口内容被绕过 DisplayList 改写后调用，下一帧整屏重绘"""
+    global _previous_frame
+    _previous_frame = None
+
+def present_frame(frame, force_full=False):
+    """把记录的指令画到窗口：首帧、强制或变化过大时整屏重绘并 flip，否则只重绘并提交脏矩形"""
+    global _previous_frame
+    previous, _previous_frame = _previous_frame, frame
+    target = pygame.display.get_surface()
+
+    dirty = None
+    if previous is not None and not force_full:
+        new = Counter((op[7], tuple(op[6])) for op in frame.ops)
+        old = Counter((op[7], tuple(op[6])) for op in previous.ops)
+        changed = list((new - old).elements()) + list((old - new).elements())
+        if len(changed) <= DIRTY_MAX_RECTS:
+            dirty = merge_rects([pygame.Rect(rect) for _, rect in changed if rect[2] > 0 and rect[3] > 0])
+            if sum(r.width * r.height for r in dirty) > DIRTY_FULL_REDRAW_RATIO * frame.bounds.width * frame.bounds.height:
+                dirty = None
+
+    if dirty is None:
+        replay_ops(target, frame.ops)
+        pygame.display.flip()
+        return
+    for rect in dirty:
+        target.set_clip(rect)
+        replay_ops(target, frame.ops, rect)
+    target.set_clip(None)
+    if dirty:
+        pygame.display.update(dirty)
+
+# --------------------------------------------------------------------------
+# 性能基准 (python main.py --bench <名称>)
+# --------------------------------------------------------------------------
+
+def bench_blit(repeat=50):
+    """比较统一 convert_alpha 与按 alpha 分类后的图片绘制吞吐量 (完全不透明 / 淡入淡出两种情况)"""
+    ensure_images(all_keys)
+    totals = {}
+    for key in sorted(images):
+        if key in ATLAS_KEYS:
+            continue
+        img = images[key]
+        before = img.convert_alpha()
+        kind = img_format(img)
+        pixels = img.get_width() * img.get_height() * repeat
+        for alpha in (255, 128):
+            row = totals.setdefault((kind, alpha), [0, 0, 0.0, 0.0])
+            row[0] += 1
+            row[1] += pixels
+            for i, surface in enumerate((before, img)):
+                set_img_alpha(surface, alpha)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    screen.blit(surface, (0, 0))
+                row[2 + i] += time.perf_counter() - start
+
+    print(f"{'格式':<10}{'alpha':>6}{'图片数':>8}{'之前 Mpx/s':>14}{'之后 Mpx/s':>14}")
+    for (kind, alpha), (count, pixels, before_s, after_s) in sorted(totals.items()):
+        print(f"{kind:<10}{alpha:>6}{count:>8}{pixels / before_s / 1e6:>14.1f}{pixels / after_s / 1e6:>14.1f}")
+
+def bench_text(repeat=20):
+    """描边文字渲染吞吐量：逐偏移重新光栅化 (旧做法) 与只光栅化一次对比"""
+    def render_per_offset(surface, text, font, color, outline_color, pos, outline_width):
+        surface.blit(font.render(text, True, BLACK), (pos[0] + 2, pos[1] + 2))
+        for dx in range(-outline_width, outline_width + 1):
+            for dy in range(-outline_width, outline_width + 1):
+                if dx != 0 or dy != 0:
+                    surface.blit(font.render(text, True, outline_color), (pos[0] + dx, pos[1] + dy))
+        surface.blit(font.render(text, True, color), pos)
+
+    lines = ["click anywhere to continue", "Collect sunlight by opening your arms.",
+             "Close arms to prevent unwanted raindrop.", "The bud has turned into a flower.", "Level 3"]
+    target = pygame.Surface((SCREEN_WIDTH, 200), pygame.SRCALPHA)
+    print(f"{'描边宽度':<8}{'之前 行/秒':>12}{'之后 行/秒':>12}")
+    for outline_width in (1, 3):
+        rates = []
+        for draw in (render_per_offset, draw_text_with_outline_and_shadow):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for line in lines:
+                    draw(target, line, game_font, TEXT_COLOR, TEXT_OUTLINE_COLOR, (10, 10), outline_width)
+            rates.append(repeat * len(lines) / (time.perf_counter() - start))
+        print(f"{outline_width:<8}{rates[0]:>12.0f}{rates[1]:>12.0f}")
+
+    _level_title_cache.clear()
+    start = time.perf_counter()
+    for _ in range(repeat * 10):
+        draw_level_text("Level 3", 255)
+    print(f"关卡标题 (缓存): {repeat * 10 / (time.perf_counter() - start):.0f} 次/秒")
+
+def bench_layout(repeat=200):
+    """level 3 介绍文字的排版速度：逐词重新测量整行 (旧做法) 与缓存单词宽度的线性排版对比"""
+    def wrap_by_remeasure(text, font, max_width):
+        lines, current_line = [], []
+        for word in text.split(' '):
+            if '\n' in word:
+                parts = word.split('\n')
+                current_line.append(parts[0])
+                lines.append(' '.join(current_line))
+                current_line = [parts[1]] if parts[1] else []
+                continue
+            if font.size(' '.join(current_line + [word]))[0] < max_width:
+                current_line.append(word)
+            else:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+        lines.append(' '.join(current_line))
+        return lines
+
+    intro = "The fragile flower needs rain and sun. \n Protect it from both sourrain and crow droppings — listen for the caw and block quickly!"
+    cases = [("level 3 介绍", intro, 1100), ("介绍 x20 不换行", " ".join([intro.replace("\n", "")] * 20), 1100)]
+    print(f"{'文本':<16}{'旧 次/秒':>10}{'冷缓存 次/秒':>14}{'热缓存 次/秒':>14}")
+    for name, text, max_width in cases:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            wrap_by_remeasure(text, game_font, max_width)
+        old_rate = repeat / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            _word_widths.clear()
+            layout_text(text, game_font, max_width)
+        cold_rate = repeat / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            layout_text(text, game_font, max_width)
+        warm_rate = repeat / (time.perf_counter() - start)
+        print(f"{name:<16}{old_rate:>10.0f}{cold_rate:>14.0f}{warm_rate:>14.0f}")
+
+def bench_particles(frames=200):
+    """每帧粒子更新 (生成 + 下落 + 剔除) 耗时：字典列表 (旧做法) / 列表结构数组 / numpy"""
+    def update_dicts(drops, max_count):
+        for _ in range(max_count - len(drops)):
+            if random.random() < 0.1:
+                drops.append({"x": random.randint(0, SCREEN_WIDTH), "y": random.randint(-SCREEN_HEIGHT // 4, 0),
+                              "speed": random.uniform(RAINDROP_SPEED_MIN, RAINDROP_SPEED_MAX)})
+        kept = []
+        for drop in drops:
+            drop["y"] += drop["speed"]
+            if drop["y"] < SCREEN_HEIGHT + 20:
+                kept.append(drop)
+        return kept
+
+    def update_store(store, max_count):
+        store.spawn(max_count)
+        store.update()
+        return store
+
+    backends = [("字典列表", list, update_dicts), ("列表", lambda: ParticleStore(use_numpy=False), update_store)]
+    if np is not None:
+        backends.append(("numpy", lambda: ParticleStore(use_numpy=True), update_store))
+    else:
+        print("未安装 numpy，跳过 numpy 对比")
+    print(f"{'粒子数':>8}" + "".join(f"{name + ' ms/帧':>16}" for name, _, _ in backends))
+    for count in (15, 1000, 100000):
+        steps = max(5, frames * 1000 // max(count, 1000))
+        row = []
+        for name, make, update in backends:
+            drops = make()
+            # 先跑到稳定状态：粒子数接近上限且分布在整个屏幕高度
+            for _ in range(SCREEN_HEIGHT // RAINDROP_SPEED_MIN):
+                drops = update(drops, count)
+            start = time.perf_counter()
+            for _ in range(steps):
+                drops = update(drops, count)
+            row.append((time.perf_counter() - start) / steps * 1000)
+        print(f"{count:>8}" + "".join(f"{ms:>16.3f}" for ms in row))
+
+BENCHMARKS = {
+    "blit": bench_blit,
+    "text": bench_text,
+    "layout": bench_layout,
+    "particles": bench_particles,
+}
+
 def main():
     global step, timer, state_start_time, img5_2_offset_y, is_dropping, last_mouse_x, arm_position_offset
     global mouse_anim_offset, has_slid, slide_time
-    global sunlight_timer, damage_accumulated, rain_phase_time, raindrops, sourraindrops, is_restarting
+    global sunlight_timer, damage_accumulated, rain_phase_time, is_restarting
     global level1_sunlight_collected, level1_rain_damage, level1_time_left, level1_weather
     global level1_weather_timer, level1_weather_duration, level1_game_active
     global level2_sunlight_collected, level2_rain_collected, level2_sourrain_damage, level2_time_left
@@ -755,6 +2291,7 @@ def main():
     global bird_warning_timer, bird_warning_duration, bird_active, bird_y, bird_checked, bird_intro_y, bird_intro_active, bird_intro_state
     global level3_bird_trigger_time, level3_bird_started, level3_bird_finished
     global is_counting_down, countdown_start_time
+    global screen
 
     running = True
     state_start_time = pygame.time.get_ticks()
@@ -763,10 +2300,23 @@ def main():
     pygame.mouse.set_visible(True) 
     
     # --- 开场播放 pic1 ---
-    sounds["pic1"].play()
+    # pic1 由后台线程加载，就绪后再播放
+    pic1_played = is_clip_ready("pic1")
+    last_drawn_step = None
+    if pic1_played:
+        play_clip("pic1")
 
     while running:
         dt = clock.tick(FPS)
+
+        # 接收后台加载好的图片
+        pump_loaded_images()
+        # 空闲帧里预热静态文字
+        warm_text_cache()
+        update_audio()
+        if not pic1_played and is_clip_ready("pic1"):
+            play_clip("pic1")
+            pic1_played = True
         current_time = pygame.time.get_ticks()
         time_since_step = current_time - state_start_time
         
@@ -813,7 +2363,7 @@ def main():
                 print("DEBUG: Jumping to Ending Sequence")
                 stop_all_environment_sounds()
                 stop_bgm_fadeout()
-                sounds["ending"].play(fade_ms=2000)
+                play_clip("ending", fade_ms=2000)
                 
                 step = 34
                 state_start_time = current_time
@@ -827,7 +2377,7 @@ def main():
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1: 
                     click_event = True
-                    sounds["click"].play() # 鼠标点击音效
+                    play_clip("click") # 鼠标点击音效
 
         if is_restarting:
             if alphas["fade_layer"] > 0:
@@ -839,11 +2389,9 @@ def main():
             if is_restarting:
                 last_mouse_x = current_mouse_x 
                 screen.fill(BLACK)
-                fade_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                fade_surface.fill(BLACK)
-                fade_surface.set_alpha(alphas["fade_layer"])
-                screen.blit(fade_surface, (0, 0))
+                draw_overlay(BLACK, alphas["fade_layer"])
                 pygame.display.flip()
+                invalidate_frame()
                 continue 
         
         # 步骤 1-15 逻辑保持不变...
@@ -859,7 +2407,7 @@ def main():
                     alphas["2-1"] = 0
                     alphas["text_step1"] = 0 
                     # 播放 pic2 和 bgm
-                    sounds["pic2"].play()
+                    play_clip("pic2")
                     play_bgm()
 
         elif step == 2:
@@ -904,7 +2452,7 @@ def main():
                     step = 6
                     state_start_time = current_time
                     is_dropping = True
-                    sounds["drop"].play() # 种子下落音效
+                    play_clip("drop") # 种子下落音效
 
         elif step == 6:
             drop_duration = 1000
@@ -922,7 +2470,7 @@ def main():
                     step = 7
                     state_start_time = current_time
                     alphas["5-4"] = 0
-                    sounds["water"].play() # 浇水音效
+                    play_clip("water") # 浇水音效
 
         elif step == 7:
             if time_since_step < 500 and alphas["5-4"] < 255: 
@@ -1044,7 +2592,7 @@ def main():
                     alphas["t-rainy"] = 255 
                     alphas["prompt_success"] = 0 
                     stop_all_environment_sounds() # 停止雨声
-                    sounds["pass"].play() # 教程通过音效
+                    play_clip("pass") # 教程通过音效
 
         elif step == 15:
             is_fading_out = (alphas["t-rainy"] > 0)
@@ -1122,7 +2670,7 @@ def main():
                 alphas["t-f"] = 0
                 alphas["level1_number"] = 0
                 alphas["level1_timer"] = 0
-                sounds["countbackward"].play() 
+                play_clip("countbackward") 
         
         # 第一关游戏进行中
         elif step == 19:
@@ -1180,7 +2728,7 @@ def main():
                         level1_game_active = False
                         alphas["2-f"] = 0
                         stop_all_environment_sounds()
-                        sounds["pass"].play() 
+                        play_clip("pass") 
                     elif level1_rain_damage >= LEVEL1_RAIN_TOLERANCE:
                         step = 20
                         state_start_time = current_time
@@ -1188,7 +2736,7 @@ def main():
                         alphas["1-baselose"] = 0
                         alphas["1-f-l"] = 0
                         stop_all_environment_sounds()
-                        sounds["fail"].play() 
+                        play_clip("fail") 
                     elif level1_time_left <= 0:
                         step = 20
                         state_start_time = current_time
@@ -1196,7 +2744,7 @@ def main():
                         alphas["1-baselose"] = 0
                         alphas["1-f-l"] = 0
                         stop_all_environment_sounds()
-                        sounds["fail"].play() 
+                        play_clip("fail") 
         
         # 第一关结算
         elif step == 20:
@@ -1296,7 +2844,7 @@ def main():
                 alphas["2-f"] = 0  
                 alphas["level2_number"] = 0
                 alphas["level2_timer"] = 0
-                sounds["countbackward"].play() 
+                play_clip("countbackward") 
         
         # 第二关游戏进行中
         elif step == 25:
@@ -1361,7 +2909,7 @@ def main():
                         level2_game_active = False
                         alphas["3-f"] = 0
                         stop_all_environment_sounds()
-                        sounds["pass"].play()
+                        play_clip("pass")
                     elif level2_sourrain_damage >= LEVEL2_SOURRAIN_TOLERANCE:
                         step = 26
                         state_start_time = current_time
@@ -1369,7 +2917,7 @@ def main():
                         alphas["1-baselose"] = 0
                         alphas["2-f-l"] = 0
                         stop_all_environment_sounds()
-                        sounds["fail"].play()
+                        play_clip("fail")
                     elif level2_time_left <= 0:
                         step = 26
                         state_start_time = current_time
@@ -1377,7 +2925,7 @@ def main():
                         alphas["1-baselose"] = 0
                         alphas["2-f-l"] = 0
                         stop_all_environment_sounds()
-                        sounds["fail"].play()
+                        play_clip("fail")
         
         # 第二关结算
         elif step == 26:
@@ -1512,7 +3060,7 @@ def main():
                 alphas["3-f"] = 0  
                 alphas["level3_number"] = 0
                 alphas["level3_timer"] = 0
-                sounds["countbackward"].play()
+                play_clip("countbackward")
                 
                 # 初始化 Sunny 鸟屎逻辑
                 level3_weather = "sunny"
@@ -1591,7 +3139,7 @@ def main():
                         # 警告阶段 (复用 level3_intro_text 变量显示顶部提示)
                         if level3_bird_started and not bird_active and not level3_bird_finished:
                             if alphas["level3_intro_text"] == 0:
-                                sounds["shit"].play()
+                                play_clip("shit")
 
                             if alphas["level3_intro_text"] < 255:
                                 alphas["level3_intro_text"] = min(255, alphas["level3_intro_text"] + FADE_SPEED * 2)
@@ -1628,7 +3176,7 @@ def main():
                                 alphas["1-baselose"] = 0
                                 alphas["3-f-l"] = 0
                                 stop_all_environment_sounds()
-                                sounds["fail"].play()
+                                play_clip("fail")
 
                     # --- 资源收集逻辑 ---
                     if level3_weather == "sunny":
@@ -1653,7 +3201,7 @@ def main():
                         for k in ["t-1", "t-l", "t-r", "3-f", "level3_number", "level3_timer", "t-sunny", "t-rainy", "1-sourrain", "birdshit", "level3_intro_text"]:
                             alphas[k] = 0
                         stop_all_environment_sounds()
-                        sounds["pass"].play()
+                        play_clip("pass")
                     
                     elif level3_sourrain_damage >= LEVEL3_SOURRAIN_TOLERANCE:
                         # 失败
@@ -1663,7 +3211,7 @@ def main():
                         alphas["1-baselose"] = 0
                         alphas["3-f-l"] = 0
                         stop_all_environment_sounds()
-                        sounds["fail"].play()
+                        play_clip("fail")
 
                     elif level3_time_left <= 0:
                         # 失败
@@ -1673,7 +3221,7 @@ def main():
                         alphas["1-baselose"] = 0
                         alphas["3-f-l"] = 0
                         stop_all_environment_sounds()
-                        sounds["fail"].play()
+                        play_clip("fail")
         
         # Step 32: 第三关失败
         elif step == 32:
@@ -1710,7 +3258,7 @@ def main():
                  step = 34
                  state_start_time = current_time
                  stop_bgm_fadeout() 
-                 sounds["ending"].play(fade_ms=2000)
+                 play_clip("ending", fade_ms=2000)
                  
         # Step 34: 最终结局 Part 2
         elif step == 34:
@@ -1761,22 +3309,10 @@ def main():
              should_rain = True
             
         if should_rain:
-            if len(raindrops) < RAINDROP_COUNT:
-                for _ in range(RAINDROP_COUNT - len(raindrops)):
-                    if random.random() < 0.1:
-                        raindrops.append({
-                            "x": random.randint(0, SCREEN_WIDTH),
-                            "y": random.randint(-SCREEN_HEIGHT // 4, 0),
-                            "speed": random.uniform(RAINDROP_SPEED_MIN, RAINDROP_SPEED_MAX),
-                        })
-            new_raindrops = []
-            for drop in raindrops:
-                drop["y"] += drop["speed"]
-                if drop["y"] < SCREEN_HEIGHT + 20: 
-                    new_raindrops.append(drop)
-            raindrops = new_raindrops
+            raindrops.spawn(RAINDROP_COUNT)
+            raindrops.update()
         else:
-            raindrops = []
+            raindrops.clear()
 
         # 判断是否下酸雨
         should_sour_rain = False
@@ -1794,86 +3330,81 @@ def main():
              should_sour_rain = True
             
         if should_sour_rain:
-            if len(sourraindrops) < RAINDROP_COUNT:
-                for _ in range(RAINDROP_COUNT - len(sourraindrops)):
-                    if random.random() < 0.1:
-                        sourraindrops.append({
-                            "x": random.randint(0, SCREEN_WIDTH),
-                            "y": random.randint(-SCREEN_HEIGHT // 4, 0),
-                            "speed": random.uniform(RAINDROP_SPEED_MIN, RAINDROP_SPEED_MAX),
-                        })
-            new_sourraindrops = []
-            for drop in sourraindrops:
-                drop["y"] += drop["speed"]
-                if drop["y"] < SCREEN_HEIGHT + 20: 
-                    new_sourraindrops.append(drop)
-            sourraindrops = new_sourraindrops
+            sourraindrops.spawn(RAINDROP_COUNT)
+            sourraindrops.update()
         else:
-            sourraindrops = []
+            sourraindrops.clear()
         
         # ----------------------------------------------------
         # 绘制阶段 (Draw)
         # ----------------------------------------------------
 
+        draw_start = time.perf_counter()
+
+        # 保证当前步骤需要的图片已加载 (场景切换时预取下一场景并释放旧场景)
+        update_asset_residency(step)
+
+        # 脏矩形模式下本帧的绘制先记录下来，最后只重绘变化的区域
+        if DIRTY_RECT_RENDERING:
+            screen = DisplayList(screen.get_size())
+
         screen.fill(BLACK) 
 
         def blit_alpha(key, pos):
-            img = images[key]
             alpha = alphas[key]
             if alpha > 0: 
-                img.set_alpha(alpha)
-                screen.blit(img, pos)
+                blit_img(key, pos, alpha)
 
         # 开场绘制逻辑 Step 1-8
-        if step >= 1 and step < 16: 
-            blit_alpha("1", (0, 0))
-            if step == 1 and alphas["text_step1"] > 0:
-                draw_styled_text_box("click anywhere to continue", alphas["text_step1"], style="bottom_left", font=ui_big_font)
-
-        if step >= 2 and step < 16: 
-            blit_alpha("2-1", (0, 0))
-            pos_2_2_x = SCREEN_WIDTH - images["2-2"].get_width()  
-            pos_2_2_y = 30 
-            blit_alpha("2-2", (pos_2_2_x, pos_2_2_y))
-
-        if step >= 3 and step < 16:
-            blit_alpha("3-1", (0, 0))
-            pos_3_2_x = SCREEN_WIDTH - images["3-2"].get_width() 
-            pos_3_2_y = 30
-            blit_alpha("3-2", (pos_3_2_x, pos_3_2_y))
-
-        if step >= 4 and step < 16:
-            blit_alpha("4", (0, 0))
-
-        if step >= 5 and step < 16:
-            blit_alpha("5-1", (0, 0))
-            pos_5_2_x = (SCREEN_WIDTH - images["5-2"].get_width()) // 2 - 15
-            pos_5_2_y = 50 + img5_2_offset_y + 165
-            blit_alpha("5-2", (pos_5_2_x, pos_5_2_y))
-            pos_5_3_x = (SCREEN_WIDTH - images["5-3"].get_width()) // 2 + 25
-            pos_5_3_y = 0 
-            blit_alpha("5-3", (pos_5_3_x, pos_5_3_y))
+        # 图层逐步叠加，先收集本帧要画的图层，被上层不透明全屏图层完全遮住的部分跳过
+        if step >= 1 and step < 9: 
+            opening_layers = [("1", (0, 0))]
+
+            if step >= 2:
+                pos_2_2_x = SCREEN_WIDTH - img_width("2-2")  
+                pos_2_2_y = 30 
+                opening_layers += [("2-1", (0, 0)), ("2-2", (pos_2_2_x, pos_2_2_y))]
+
+            if step >= 3:
+                pos_3_2_x = SCREEN_WIDTH - img_width("3-2") 
+                pos_3_2_y = 30
+                opening_layers += [("3-1", (0, 0)), ("3-2", (pos_3_2_x, pos_3_2_y))]
+
+            if step >= 4:
+                opening_layers.append(("4", (0, 0)))
+
+            if step >= 5:
+                pos_5_2_x = (SCREEN_WIDTH - img_width("5-2")) // 2 - 15
+                pos_5_2_y = 50 + img5_2_offset_y + 165
+                pos_5_3_x = (SCREEN_WIDTH - img_width("5-3")) // 2 + 25
+                pos_5_3_y = 0 
+                opening_layers += [("5-1", (0, 0)), ("5-2", (pos_5_2_x, pos_5_2_y)), ("5-3", (pos_5_3_x, pos_5_3_y))]
         
-        if step >= 7 and step < 16:
-            pos_5_4_x = (SCREEN_WIDTH - images["5-4"].get_width()) // 2 + 110
-            pos_5_4_y = (SCREEN_HEIGHT - images["5-4"].get_height()) // 2 - 140 
-            blit_alpha("5-4", (pos_5_4_x, pos_5_4_y))
+            if step >= 7:
+                pos_5_4_x = (SCREEN_WIDTH - img_width("5-4")) // 2 + 110
+                pos_5_4_y = (SCREEN_HEIGHT - img_height("5-4")) // 2 - 140 
+                opening_layers.append(("5-4", (pos_5_4_x, pos_5_4_y)))
+
+            if step == 8: 
+                opening_layers.append(("5-5", (0, 0)))
+
+            draw_layers(opening_layers)
 
-        if step == 8: 
-             blit_alpha("5-5", (0, 0))
+            if step == 1 and alphas["text_step1"] > 0:
+                draw_styled_text_box("click anywhere to continue", alphas["text_step1"], style="bottom_left", font=ui_big_font)
 
         # --- 绘制教学图层 (Step 9-15) ---
 
         if step >= 9 and step < 16:
             blit_alpha("t-1", (0, 0))
 
-            pos_f_x = (SCREEN_WIDTH - images["t-f"].get_width()) // 2 + 20
-            pos_f_y = SCREEN_HEIGHT - images["t-f"].get_height() - 200
+            pos_f_x = (SCREEN_WIDTH - img_width("t-f")) // 2 + 20
+            pos_f_y = SCREEN_HEIGHT - img_height("t-f") - 200
             blit_alpha("t-f", (pos_f_x, pos_f_y))
             
             center_x = SCREEN_WIDTH // 2 + 10
-            center_y = SCREEN_HEIGHT - images["t-l"].get_height() + 200 
-            hand_l_x = center_x - images["t-l"].get_width() - arm_position_offset - 30
+            center_y = SCREEN_HEIGHT - img_height("t-l") + 200 
+            hand_l_x = center_x - img_width("t-l") - arm_position_offset - 30
             hand_l_y = center_y 
             blit_alpha("t-l", (hand_l_x, hand_l_y))
             hand_r_x = center_x + arm_position_offset + 30
@@ -1882,13 +3413,13 @@ def main():
             
             if step == 10 or step == 11:
                 current_mouse_offset = mouse_anim_offset 
-                mouse_base_x = SCREEN_WIDTH * 0.75 - images["t-m"].get_width() // 2 - 100 
+                mouse_base_x = SCREEN_WIDTH * 0.75 - img_width("t-m") // 2 - 100 
                 mouse_base_y = SCREEN_HEIGHT * 0.7 - 200
                 pos_m_x = mouse_base_x + current_mouse_offset
                 pos_m_y = mouse_base_y
                 blit_alpha("t-m", (pos_m_x, pos_m_y))
-                pos_a_x = mouse_base_x + images["t-m"].get_width() // 2 - 150 
-                pos_a_y = mouse_base_y + images["t-m"].get_height() // 2 + 50
+                pos_a_x = mouse_base_x + img_width("t-m") // 2 - 150 
+                pos_a_y = mouse_base_y + img_height("t-m") // 2 + 50
                 blit_alpha("t-a", (pos_a_x, pos_a_y))
             
             if step == 10 or step == 11:
@@ -1927,10 +3458,7 @@ def main():
                 draw_styled_text_box(text_to_draw, alphas["prompt_success"])
 
             if step >= 14 and alphas["t-rainy"] > 0 and len(raindrops) > 0:
-                raindrop_img = images["t-raindrop"]
-                raindrop_img.set_alpha(255)
-                for drop in raindrops:
-                    screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops)
                 
         # ====================================================
         # 第一关绘制
@@ -1943,21 +3471,15 @@ def main():
                 
             if alphas["1-rainy"] > 0:
                 blit_alpha("1-rainy", (0, 0))
-                if len(raindrops) > 0:
-                    raindrop_img = images["t-raindrop"]
-                    raindrop_img.set_alpha(alphas["1-rainy"])
-                    for drop in raindrops:
-                        screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops, alphas["1-rainy"])
 
             # --- 花朵绘制 ---
             flower_alpha = max(alphas["1-sunny"], alphas["1-rainy"])
             if flower_alpha > 0 and "t-f-intro-scaled" in images:
                 # 优化：使用预缩放的图片
-                img = images["t-f-intro-scaled"]
-                img.set_alpha(flower_alpha)
-                pos_f_x = (SCREEN_WIDTH - img.get_width()) // 2 + 10
-                pos_f_y = SCREEN_HEIGHT - img.get_height() - 277
-                screen.blit(img, (pos_f_x, pos_f_y))
+                pos_f_x = (SCREEN_WIDTH - img_width("t-f-intro-scaled")) // 2 + 10
+                pos_f_y = SCREEN_HEIGHT - img_height("t-f-intro-scaled") - 277
+                blit_img("t-f-intro-scaled", (pos_f_x, pos_f_y), flower_alpha)
             
             # --- 文字绘制 ---
             if alphas["level1_text"] > 0:
@@ -1968,40 +3490,24 @@ def main():
                 draw_styled_text_box("The seedling has been watered! Time for some sunlight!", alphas["level1_intro_text"])
         
         elif step == 19:
-            blit_alpha("t-1", (0, 0))
-
-            pos_f_x = (SCREEN_WIDTH - images["t-f"].get_width()) // 2 + 20
-            pos_f_y = SCREEN_HEIGHT - images["t-f"].get_height() - 200
-            blit_alpha("t-f", (pos_f_x, pos_f_y))
+            pos_f_x = (SCREEN_WIDTH - img_width("t-f")) // 2 + 20
+            pos_f_y = SCREEN_HEIGHT - img_height("t-f") - 200
 
             center_x = SCREEN_WIDTH // 2 + 10
-            center_y = SCREEN_HEIGHT - images["t-l"].get_height() + 200 
-            hand_l_x = center_x - images["t-l"].get_width() - arm_position_offset - 30
+            center_y = SCREEN_HEIGHT - img_height("t-l") + 200 
+            hand_l_x = center_x - img_width("t-l") - arm_position_offset - 30
             hand_l_y = center_y 
-            blit_alpha("t-l", (hand_l_x, hand_l_y))
             hand_r_x = center_x + arm_position_offset + 30
             hand_r_y = center_y 
-            blit_alpha("t-r", (hand_r_x, hand_r_y))
+
+            # 背景、花朵和天气滤镜来自缓存，每帧只重画手臂所在区域
+            draw_gameplay_backdrop("t-f", (pos_f_x, pos_f_y), level1_weather, is_counting_down,
+                                   [("t-l", (hand_l_x, hand_l_y)), ("t-r", (hand_r_x, hand_r_y))])
 
             if is_counting_down:
-                images["t-sunny"].set_alpha(255)
-                screen.blit(images["t-sunny"], (0, 0))
-            elif level1_weather == "sunny":
-                images["t-sunny"].set_alpha(255)
-                screen.blit(images["t-sunny"], (0, 0))
-            elif level1_weather == "rainy":
-                images["t-rainy"].set_alpha(255)
-                screen.blit(images["t-rainy"], (0, 0))
-            
-            if is_counting_down:
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                overlay.fill((128, 128, 128)) 
-                overlay.set_alpha(150) 
-                screen.blit(overlay, (0, 0))
-                
                 time_rem = 3 - int((current_time - countdown_start_time) / 1000)
                 if time_rem > 0:
-                    count_text = countdown_font.render(str(time_rem), True, WHITE)
+                    count_text = render_glyph_text(countdown_font, str(time_rem))
                     count_rect = count_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
                     screen.blit(count_text, count_rect)
             
@@ -2026,23 +3532,20 @@ def main():
                 draw_progress_bar_custom(level1_rain_damage, LEVEL1_RAIN_TOLERANCE, 255, "icon_heart", start_x + bar_width + spacing, SCREEN_HEIGHT - 100, bar_width, 20, is_damage=True)
             
             if level1_weather == "rainy" and len(raindrops) > 0 and not is_counting_down:
-                raindrop_img = images["t-raindrop"]
-                raindrop_img.set_alpha(255)
-                for drop in raindrops:
-                    screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops)
                 
         elif step == 20:
             if level1_sunlight_collected >= LEVEL1_SUNLIGHT_REQUIRED:
                 blit_alpha("t-1", (0, 0))
-                pos_f_x = (SCREEN_WIDTH - images["2-f"].get_width()) // 2 + 10
-                pos_f_y = SCREEN_HEIGHT - images["2-f"].get_height() - 200
+                pos_f_x = (SCREEN_WIDTH - img_width("2-f")) // 2 + 10
+                pos_f_y = SCREEN_HEIGHT - img_height("2-f") - 200
                 blit_alpha("2-f", (pos_f_x, pos_f_y))
                 if alphas["level1_intro_text"] > 0:
                     draw_styled_text_box("The seed has turned into a bud.", alphas["level1_intro_text"])
             else:
                 blit_alpha("1-baselose", (0, 0))
-                pos_f_x = (SCREEN_WIDTH - images["1-f-l"].get_width()) // 2 + 20
-                pos_f_y = SCREEN_HEIGHT - images["1-f-l"].get_height() - 200
+                pos_f_x = (SCREEN_WIDTH - img_width("1-f-l")) // 2 + 20
+                pos_f_y = SCREEN_HEIGHT - img_height("1-f-l") - 200
                 blit_alpha("1-f-l", (pos_f_x, pos_f_y))
                 if alphas["prompt_fail_l1"] > 0:
                     draw_styled_text_box("You lost. The seed dies. Click to try again.", alphas["prompt_fail_l1"])
@@ -2057,30 +3560,20 @@ def main():
                 blit_alpha("1-sunny", (0, 0))
             if alphas["1-rainy"] > 0:
                 blit_alpha("1-rainy", (0, 0))
-                if len(raindrops) > 0:
-                    raindrop_img = images["t-raindrop"]
-                    raindrop_img.set_alpha(alphas["1-rainy"])
-                    for drop in raindrops:
-                        screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops, alphas["1-rainy"])
             if alphas["1-sourrain"] > 0:
                 blit_alpha("1-sourrain", (0, 0))
-                if len(sourraindrops) > 0:
-                    sourraindrop_img = images["sourraindrop"]
-                    sourraindrop_img.set_alpha(alphas["1-sourrain"])
-                    for drop in sourraindrops:
-                        screen.blit(sourraindrop_img, (drop["x"], drop["y"]))
+                draw_particles("sourraindrop", sourraindrops, alphas["1-sourrain"])
             
             # --- 花朵绘制 ---
             flower_alpha = max(alphas["1-sunny"], alphas["1-rainy"], alphas["1-sourrain"])
             if flower_alpha > 0:
                 scale_ratio = 2/3
-                orig_w = images["2-f"].get_width()
-                orig_h = images["2-f"].get_height()
-                scaled_flower = pygame.transform.smoothscale(images["2-f"], (int(orig_w * scale_ratio), int(orig_h * scale_ratio)))
-                scaled_flower.set_alpha(flower_alpha)
-                pos_f_x = (SCREEN_WIDTH - scaled_flower.get_width()) // 2 - 3
-                pos_f_y = SCREEN_HEIGHT - scaled_flower.get_height() - 277
-                screen.blit(scaled_flower, (pos_f_x, pos_f_y))
+                scaled_flower, (offset_x, offset_y), (scaled_w, scaled_h) = scaled_img("2-f", scale_ratio)
+                set_img_alpha(scaled_flower, flower_alpha)
+                pos_f_x = (SCREEN_WIDTH - scaled_w) // 2 - 3
+                pos_f_y = SCREEN_HEIGHT - scaled_h - 277
+                screen.blit(scaled_flower, (pos_f_x + offset_x, pos_f_y + offset_y), )
 
             # --- 文字绘制 ---
             if alphas["level2_text"] > 0:
@@ -2091,45 +3584,24 @@ def main():
                 draw_styled_text_box("To make it bloom, give it plenty of sun and rain. But watch out for the sourrain!", alphas["level2_intro_text"])
         
         elif step == 25:
-            blit_alpha("t-1", (0, 0))
-
-            pos_f_x = (SCREEN_WIDTH - images["2-f"].get_width()) // 2 + 5
-            pos_f_y = SCREEN_HEIGHT - images["2-f"].get_height() - 200
-            blit_alpha("2-f", (pos_f_x, pos_f_y))
+            pos_f_x = (SCREEN_WIDTH - img_width("2-f")) // 2 + 5
+            pos_f_y = SCREEN_HEIGHT - img_height("2-f") - 200
 
             center_x = SCREEN_WIDTH // 2 + 10
-            center_y = SCREEN_HEIGHT - images["t-l"].get_height() + 200 
-            hand_l_x = center_x - images["t-l"].get_width() - arm_position_offset - 30
+            center_y = SCREEN_HEIGHT - img_height("t-l") + 200 
+            hand_l_x = center_x - img_width("t-l") - arm_position_offset - 30
             hand_l_y = center_y 
-            blit_alpha("t-l", (hand_l_x, hand_l_y))
             hand_r_x = center_x + arm_position_offset + 30
             hand_r_y = center_y 
-            blit_alpha("t-r", (hand_r_x, hand_r_y))
+
+            # 背景、花朵和天气滤镜来自缓存，每帧只重画手臂所在区域
+            draw_gameplay_backdrop("2-f", (pos_f_x, pos_f_y), level2_weather, is_counting_down,
+                                   [("t-l", (hand_l_x, hand_l_y)), ("t-r", (hand_r_x, hand_r_y))])
 
             if is_counting_down:
-                 images["t-sunny"].set_alpha(255)
-                 screen.blit(images["t-sunny"], (0, 0))
-            elif level2_weather == "sunny":
-                images["t-sunny"].set_alpha(255)
-                screen.blit(images["t-sunny"], (0, 0))
-            elif level2_weather == "rainy":
-                images["t-rainy"].set_alpha(255)
-                screen.blit(images["t-rainy"], (0, 0))
-            elif level2_weather == "sourrain":
-                sour_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                sour_overlay.fill((140, 160, 60)) 
-                sour_overlay.set_alpha(100) 
-                screen.blit(sour_overlay, (0, 0))
-            
-            if is_counting_down:
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                overlay.fill((128, 128, 128))
-                overlay.set_alpha(150)
-                screen.blit(overlay, (0, 0))
-                
                 time_rem = 3 - int((current_time - countdown_start_time) / 1000)
                 if time_rem > 0:
-                    count_text = countdown_font.render(str(time_rem), True, WHITE)
+                    count_text = render_glyph_text(countdown_font, str(time_rem))
                     count_rect = count_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
                     screen.blit(count_text, count_rect)
 
@@ -2156,30 +3628,24 @@ def main():
                 draw_progress_bar_custom(level2_sourrain_damage, LEVEL2_SOURRAIN_TOLERANCE, 255, "icon_heart", row2_start_x, SCREEN_HEIGHT - 100, bar_width, 20, is_damage=True)
             
             if level2_weather == "rainy" and len(raindrops) > 0 and not is_counting_down:
-                raindrop_img = images["t-raindrop"]
-                raindrop_img.set_alpha(255)
-                for drop in raindrops:
-                    screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops)
 
             elif level2_weather == "sourrain" and len(sourraindrops) > 0 and not is_counting_down:
-                sourraindrop_img = images["sourraindrop"]
-                sourraindrop_img.set_alpha(255)
-                for drop in sourraindrops:
-                    screen.blit(sourraindrop_img, (drop["x"], drop["y"]))
+                draw_particles("sourraindrop", sourraindrops)
         
         elif step == 26:
             if (level2_sunlight_collected >= LEVEL2_SUNLIGHT_REQUIRED and 
                 level2_rain_collected >= LEVEL2_RAIN_REQUIRED):
                 blit_alpha("t-1", (0, 0))
-                pos_f_x = (SCREEN_WIDTH - images["3-f"].get_width()) // 2 + 20
-                pos_f_y = SCREEN_HEIGHT - images["3-f"].get_height() - 200
+                pos_f_x = (SCREEN_WIDTH - img_width("3-f")) // 2 + 20
+                pos_f_y = SCREEN_HEIGHT - img_height("3-f") - 200
                 blit_alpha("3-f", (pos_f_x, pos_f_y))
                 if alphas["level2_intro_text"] > 0:
                     draw_styled_text_box("The bud has turned into a flower.", alphas["level2_intro_text"])
             else:
                 blit_alpha("1-baselose", (0, 0))
-                pos_f_x = (SCREEN_WIDTH - images["2-f-l"].get_width()) // 2 + 20
-                pos_f_y = SCREEN_HEIGHT - images["2-f-l"].get_height() - 200
+                pos_f_x = (SCREEN_WIDTH - img_width("2-f-l")) // 2 + 20
+                pos_f_y = SCREEN_HEIGHT - img_height("2-f-l") - 200
                 blit_alpha("2-f-l", (pos_f_x, pos_f_y))
                 if alphas["prompt_fail_l2"] > 0:
                     draw_styled_text_box("You lost. The bud dies. Click to try again.", alphas["prompt_fail_l2"])
@@ -2194,36 +3660,26 @@ def main():
                 blit_alpha("1-sunny", (0, 0))
             if alphas["1-rainy"] > 0:
                 blit_alpha("1-rainy", (0, 0))
-                if len(raindrops) > 0:
-                    raindrop_img = images["t-raindrop"]
-                    raindrop_img.set_alpha(alphas["1-rainy"])
-                    for drop in raindrops:
-                        screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops, alphas["1-rainy"])
             if alphas["1-sourrain"] > 0:
                 blit_alpha("1-sourrain", (0, 0))
-                if len(sourraindrops) > 0:
-                    sourraindrop_img = images["sourraindrop"]
-                    sourraindrop_img.set_alpha(alphas["1-sourrain"])
-                    for drop in sourraindrops:
-                        screen.blit(sourraindrop_img, (drop["x"], drop["y"]))
+                draw_particles("sourraindrop", sourraindrops, alphas["1-sourrain"])
             
              # --- 鸟屎 Intro ---
             if alphas["birdshit"] > 0:
                 bird_img = images["birdshit"]
-                bird_img.set_alpha(alphas["birdshit"])
+                set_img_alpha(bird_img, alphas["birdshit"])
                 screen.blit(bird_img, (bird_intro_x - bird_img.get_width() // 2, bird_intro_y))
 
             # --- 花朵绘制 ---
             flower_alpha = max(alphas["1-sunny"], alphas["1-rainy"], alphas["1-sourrain"])
             if flower_alpha > 0:
                 scale_ratio = 2/3
-                orig_w = images["3-f"].get_width()
-                orig_h = images["3-f"].get_height()
-                scaled_flower = pygame.transform.smoothscale(images["3-f"], (int(orig_w * scale_ratio), int(orig_h * scale_ratio)))
-                scaled_flower.set_alpha(flower_alpha)
-                pos_f_x = (SCREEN_WIDTH - scaled_flower.get_width()) // 2
-                pos_f_y = SCREEN_HEIGHT - scaled_flower.get_height() - 277
-                screen.blit(scaled_flower, (pos_f_x, pos_f_y))
+                scaled_flower, (offset_x, offset_y), (scaled_w, scaled_h) = scaled_img("3-f", scale_ratio)
+                set_img_alpha(scaled_flower, flower_alpha)
+                pos_f_x = (SCREEN_WIDTH - scaled_w) // 2
+                pos_f_y = SCREEN_HEIGHT - scaled_h - 277
+                screen.blit(scaled_flower, (pos_f_x + offset_x, pos_f_y + offset_y), )
 
             # --- 文字绘制 ---
             if alphas["level3_text"] > 0:
@@ -2234,52 +3690,31 @@ def main():
                 draw_styled_text_box("The fragile flower needs rain and sun. \n Protect it from both sourrain and crow droppings — listen for the caw and block quickly!", alphas["level3_intro_text"])
 
         elif step == 31:
-            blit_alpha("t-1", (0, 0))
-            
-            pos_f_x = (SCREEN_WIDTH - images["3-f"].get_width()) // 2 + 15
-            pos_f_y = SCREEN_HEIGHT - images["3-f"].get_height() - 200
-            blit_alpha("3-f", (pos_f_x, pos_f_y))
+            pos_f_x = (SCREEN_WIDTH - img_width("3-f")) // 2 + 15
+            pos_f_y = SCREEN_HEIGHT - img_height("3-f") - 200
 
             center_x = SCREEN_WIDTH // 2 + 10
-            center_y = SCREEN_HEIGHT - images["t-l"].get_height() + 200 
-            hand_l_x = center_x - images["t-l"].get_width() - arm_position_offset - 30
+            center_y = SCREEN_HEIGHT - img_height("t-l") + 200 
+            hand_l_x = center_x - img_width("t-l") - arm_position_offset - 30
             hand_l_y = center_y 
-            blit_alpha("t-l", (hand_l_x, hand_l_y))
             hand_r_x = center_x + arm_position_offset + 30
             hand_r_y = center_y 
-            blit_alpha("t-r", (hand_r_x, hand_r_y))
+
+            # 背景、花朵和天气滤镜来自缓存，每帧只重画手臂所在区域
+            draw_gameplay_backdrop("3-f", (pos_f_x, pos_f_y), level3_weather, is_counting_down,
+                                   [("t-l", (hand_l_x, hand_l_y)), ("t-r", (hand_r_x, hand_r_y))])
 
             if is_counting_down:
-                 images["t-sunny"].set_alpha(255)
-                 screen.blit(images["t-sunny"], (0, 0))
-            elif level3_weather == "sunny":
-                images["t-sunny"].set_alpha(255)
-                screen.blit(images["t-sunny"], (0, 0))
-            elif level3_weather == "rainy":
-                images["t-rainy"].set_alpha(255)
-                screen.blit(images["t-rainy"], (0, 0))
-            elif level3_weather == "sourrain":
-                sour_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                sour_overlay.fill((140, 160, 60)) 
-                sour_overlay.set_alpha(100) 
-                screen.blit(sour_overlay, (0, 0))
-            
-            if is_counting_down:
-                overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-                overlay.fill((128, 128, 128))
-                overlay.set_alpha(150)
-                screen.blit(overlay, (0, 0))
-                
                 time_rem = 3 - int((current_time - countdown_start_time) / 1000)
                 if time_rem > 0:
-                    count_text = countdown_font.render(str(time_rem), True, WHITE)
+                    count_text = render_glyph_text(countdown_font, str(time_rem))
                     count_rect = count_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
                     screen.blit(count_text, count_rect)
 
             # 鸟屎绘制
             if bird_active and alphas["birdshit"] > 0:
                 bird_img = images["birdshit"]
-                bird_img.set_alpha(alphas["birdshit"])
+                set_img_alpha(bird_img, alphas["birdshit"])
                 screen.blit(bird_img, (bird_x - bird_img.get_width() // 2, bird_y))
 
             if alphas["level3_number"] > 0:
@@ -2310,22 +3745,16 @@ def main():
 
 
             if level3_weather == "rainy" and len(raindrops) > 0 and not is_counting_down:
-                raindrop_img = images["t-raindrop"]
-                raindrop_img.set_alpha(255)
-                for drop in raindrops:
-                    screen.blit(raindrop_img, (drop["x"], drop["y"]))
+                draw_particles("t-raindrop", raindrops)
 
             elif level3_weather == "sourrain" and len(sourraindrops) > 0 and not is_counting_down:
-                sourraindrop_img = images["sourraindrop"]
-                sourraindrop_img.set_alpha(255)
-                for drop in sourraindrops:
-                    screen.blit(sourraindrop_img, (drop["x"], drop["y"]))
+                draw_particles("sourraindrop", sourraindrops)
 
         # Step 32: 第三关失败
         elif step == 32:
             blit_alpha("1-baselose", (0, 0))
-            pos_f_x = (SCREEN_WIDTH - images["3-f-l"].get_width()) // 2 + 20
-            pos_f_y = SCREEN_HEIGHT - images["3-f-l"].get_height() - 200
+            pos_f_x = (SCREEN_WIDTH - img_width("3-f-l")) // 2 + 20
+            pos_f_y = SCREEN_HEIGHT - img_height("3-f-l") - 200
             blit_alpha("3-f-l", (pos_f_x, pos_f_y))
             
             if alphas["level3_prompt_fail"] > 0:
@@ -2349,10 +3778,36 @@ def main():
             running = False
 
 
-        pygame.display.flip()
+        if DIRTY_RECT_RENDERING:
+            frame, screen = screen, pygame.display.get_surface()
+            present_frame(frame, force_full=step != last_drawn_step)
+        else:
+            pygame.display.flip()
+        last_drawn_step = step
+        record_frame_time(step, time.perf_counter() - draw_start)
+
+        if "first_frame" not in startup_metrics:
+            startup_metrics["first_frame"] = (time.perf_counter() - APP_START_TIME) * 1000
+            print(f"首帧耗时: {startup_metrics['first_frame']:.0f} ms")
 
+    report_frame_stats()
+    print(_text_surface_cache.stats())
+    stop_loaders()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
+    if "--check-texts" in sys.argv:
+        missing = check_ui_texts()
+        for content, style, font_name in missing:
+            print(f"未登记到 UI_TEXTS: {content!r} ({style}, {font_name})")
+        print(f"文字登记检查: {len(missing)} 项未登记")
+        stop_loaders()
+        pygame.quit()
+        sys.exit(1 if missing else 0)
+    if "--bench" in sys.argv:
+        BENCHMARKS[sys.argv[sys.argv.index("--bench") + 1]]()
+        stop_loaders()
+        pygame.quit()
+        sys.exit()
     main()
\ No newline at end of file